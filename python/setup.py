@@ -15,6 +15,8 @@ from typing import NamedTuple
 from setuptools import Extension, setup
 from setuptools.command.build_ext import build_ext
 from setuptools.command.build_py import build_py
+from setuptools.command.develop import develop
+from setuptools.command.install import install
 from dataclasses import dataclass
 
 
@@ -234,6 +236,29 @@ class CMakeBuildPy(build_py):
         return super().run()
 
 
+def precompute_triton_key(package_dir):
+    # hashing libtriton is slow: do it once at install time rather than in the first process that compiles
+    code = "from triton.compiler.compiler import precompute_triton_key; precompute_triton_key()"
+    try:
+        subprocess.check_call([sys.executable, "-c", code], cwd=package_dir)
+    except (OSError, subprocess.CalledProcessError):
+        print("warning: could not precompute triton_key(); it will be computed on first use")
+
+
+class TritonInstall(install):
+
+    def run(self) -> None:
+        super().run()
+        precompute_triton_key(self.install_lib)
+
+
+class TritonDevelop(develop):
+
+    def run(self) -> None:
+        super().run()
+        precompute_triton_key(os.path.join(get_base_dir(), "python"))
+
+
 class CMakeExtension(Extension):
 
     def __init__(self, name, path, sourcedir=""):
@@ -376,7 +401,7 @@ download_and_copy(
     url_func=lambda arch, version:
     f"https://anaconda.org/nvidia/cuda-nvdisasm/12.3.52/download/linux-{arch}/cuda-nvdisasm-{version}-0.tar.bz2",
 )
-backends = _copy_backends(["nvidia", "amd"])
+backends = _copy_backends(["nvidia", "amd", "null"])
 
 package_data = dict()
 package_data["triton/tools"] = ["compile.h", "compile.c"]
@@ -405,7 +430,13 @@ setup(
     package_data=package_data,
     include_package_data=True,
     ext_modules=[CMakeExtension("triton", "triton/_C/")],
-    cmdclass={"build_ext": CMakeBuild, "build_py": CMakeBuildPy, "clean": CMakeClean},
+    cmdclass={
+        "build_ext": CMakeBuild,
+        "build_py": CMakeBuildPy,
+        "clean": CMakeClean,
+        "install": TritonInstall,
+        "develop": TritonDevelop,
+    },
     zip_safe=False,
     # for PyPI
     keywords=["Compiler", "Deep Learning"],
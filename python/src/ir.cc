@@ -388,6 +388,8 @@ void init_triton_ir(py::module &&m) {
   py::class_<mlir::ModuleOp, mlir::OpState>(m, "module", py::module_local(),
                                             py::dynamic_attr())
       .def("dump", &mlir::ModuleOp::dump)
+      // destroys the module's operations; the module must not be used after
+      .def("erase", [](mlir::ModuleOp &self) -> void { self.erase(); })
       .def("str",
            [](mlir::ModuleOp &self) -> std::string {
              std::string str;
@@ -432,20 +434,23 @@ void init_triton_ir(py::module &&m) {
 
   m.def(
       "parse_mlir_module",
-      [](const std::string &inputFilename, mlir::MLIRContext &context) {
+      [](const std::string &inputFilename, mlir::MLIRContext &context,
+         bool keepLocations) {
         // parse module
         mlir::OwningOpRef<mlir::ModuleOp> module =
             mlir::parseSourceFile<mlir::ModuleOp>(inputFilename, &context);
         if (!module)
           throw std::runtime_error("Parse MLIR file failed.");
         // locations are incompatible with ptx < 7.5 !
-        module->walk([](mlir::Operation *op) {
-          op->setLoc(mlir::UnknownLoc::get(op->getContext()));
-        });
+        if (!keepLocations)
+          module->walk([](mlir::Operation *op) {
+            op->setLoc(mlir::UnknownLoc::get(op->getContext()));
+          });
 
         return module->clone();
       },
-      ret::take_ownership);
+      py::arg("filename"), py::arg("context"),
+      py::arg("keep_locations") = false, ret::take_ownership);
 
   py::class_<mlir::triton::FuncOp, mlir::OpState>(m, "function",
                                                   py::module_local())
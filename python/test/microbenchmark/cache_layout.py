@@ -0,0 +1,80 @@
+"""
+Measures cache lookup latency with the flat (one directory per key directly in
+the cache directory) and the sharded (`<key[:2]>/<key>`) layouts.
+
+For each size, a cache with that many entries is created in both layouts, then
+the time to look up existing and missing entries (as `FileCacheManager.get_group`
+does) and to list the cache is reported.
+
+    python cache_layout.py [--sizes 10000,100000,1000000] [--dir DIR] [--lookups N]
+
+Creating a million entries takes a while and a few GB of inodes; point `--dir`
+at the file system you care about (e.g. an NFS mount).
+"""
+import argparse
+import hashlib
+import os
+import random
+import shutil
+import tempfile
+import time
+
+
+def key_of(i):
+    return hashlib.sha256(str(i).encode("utf-8")).hexdigest()
+
+
+def entry_path(root, key, sharded):
+    return os.path.join(root, key[:2], key) if sharded else os.path.join(root, key)
+
+
+def populate(root, n, sharded):
+    for i in range(n):
+        path = entry_path(root, key_of(i), sharded)
+        os.makedirs(path)
+        with open(os.path.join(path, "__grp__kernel.json"), "w") as f:
+            f.write("{}")
+
+
+def time_lookups(root, keys, sharded):
+    start = time.perf_counter()
+    for key in keys:
+        os.path.exists(os.path.join(entry_path(root, key, sharded), "__grp__kernel.json"))
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+
+def time_listing(root, sharded):
+    start = time.perf_counter()
+    if sharded:
+        n = sum(len(os.listdir(os.path.join(root, shard))) for shard in os.listdir(root))
+    else:
+        n = len(os.listdir(root))
+    return (time.perf_counter() - start) * 1e3, n
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dir", default=None, help="where to create the caches (default: a temporary directory)")
+    parser.add_argument("--lookups", type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"{'entries':>10} {'layout':>8} {'hit (us)':>10} {'miss (us)':>10} {'list (ms)':>10}")
+    for n in [int(size) for size in args.sizes.split(",")]:
+        for sharded in [False, True]:
+            root = tempfile.mkdtemp(dir=args.dir)
+            try:
+                populate(root, n, sharded)
+                hits = [key_of(random.randrange(n)) for _ in range(args.lookups)]
+                misses = [key_of(n + i) for i in range(args.lookups)]
+                hit = time_lookups(root, hits, sharded)
+                miss = time_lookups(root, misses, sharded)
+                listing, _ = time_listing(root, sharded)
+                layout = "sharded" if sharded else "flat"
+                print(f"{n:>10} {layout:>8} {hit:>10.2f} {miss:>10.2f} {listing:>10.1f}")
+            finally:
+                shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Measures the cold-start cost of `JITFunction.cache_key` for a module of many
+`@triton.jit` functions that call each other, in fresh interpreters: once with
+an empty cache directory (every function's source is parsed to find its
+dependencies) and once with the call paths memoized by the previous run.
+
+    python cold_start_cache_key.py [--functions 200] [--reps 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+CHILD = """
+import sys, time
+sys.path.insert(0, {module_dir!r})
+import triton
+import kernels
+start = time.perf_counter()
+for i in range({functions}):
+    getattr(kernels, f"fn{{i}}").cache_key
+print(time.perf_counter() - start)
+"""
+
+
+def write_module(path, functions):
+    lines = ["import triton", "import triton.language as tl", ""]
+    for i in range(functions):
+        callee = f"fn{i - 1}(x)" if i else "x"
+        lines += ["", "@triton.jit", f"def fn{i}(x):", f"    y = x * {i} + 1", f"    return {callee} + y", ""]
+    with open(path, "w") as f:
+        f.write("\n".join(lines))
+
+
+def run(module_dir, cache_dir, functions):
+    child = CHILD.format(module_dir=module_dir, functions=functions)
+    out = subprocess.check_output([sys.executable, "-c", child], env=dict(os.environ, TRITON_CACHE_DIR=cache_dir))
+    return float(out.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--functions", type=int, default=200)
+    parser.add_argument("--reps", type=int, default=5)
+    args = parser.parse_args()
+    cold, warm = [], []
+    with tempfile.TemporaryDirectory() as module_dir:
+        write_module(os.path.join(module_dir, "kernels.py"), args.functions)
+        for _ in range(args.reps):
+            with tempfile.TemporaryDirectory() as cache_dir:
+                cold.append(run(module_dir, cache_dir, args.functions))
+                warm.append(run(module_dir, cache_dir, args.functions))
+    cold, warm = statistics.median(cold), statistics.median(warm)
+    print(f"cache_key of {args.functions} functions in a fresh process")
+    print(f"empty cache (parse every function): {cold * 1e3:8.1f} ms")
+    print(f"memoized call paths:                {warm * 1e3:8.1f} ms ({cold / warm:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Measures how many tiny kernels per second `triton.compile` produces, with and
+without the pool of MLIR contexts (`TRITON_CONTEXT_POOL_SIZE=0`), each
+starting from an empty cache. No GPU is needed: kernels are compiled for
+`--target` (the null backend by default).
+
+    python compile_throughput.py [--kernels 200] [--threads 1] [--target cuda:80]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+CHILD = """
+import time, triton, triton.language as tl
+from concurrent.futures import ThreadPoolExecutor
+from triton.compiler import ASTSource
+
+@triton.jit
+def add(X, Y, N, BLOCK: tl.constexpr, SCALE: tl.constexpr):
+    offs = tl.program_id(0) * BLOCK + tl.arange(0, BLOCK)
+    mask = offs < N
+    tl.store(Y + offs, tl.load(X + offs, mask=mask) * SCALE, mask=mask)
+
+def compile(i):
+    src = ASTSource(add, signature={0: "*fp32", 1: "*fp32", 2: "i32"}, constants={3: 128, 4: i})
+    triton.compile(src, target={target})
+
+compile(-1)
+start = time.perf_counter()
+with ThreadPoolExecutor({threads}) as executor:
+    list(executor.map(compile, range({kernels})))
+print(time.perf_counter() - start)
+"""
+
+
+def run(kernels, threads, target, pool):
+    child = CHILD.replace("{kernels}", str(kernels)).replace("{threads}", str(threads))
+    child = child.replace("{target}", repr(target))
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, TRITON_CACHE_DIR=cache_dir, TRITON_STAGE_CACHE="0")
+        if target[0] == "null":
+            env["TRITON_DRIVER"] = "null"
+        if not pool:
+            env["TRITON_CONTEXT_POOL_SIZE"] = "0"
+        out = subprocess.check_output([sys.executable, "-c", child], env=env)
+    return float(out.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--kernels", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--target", default="null:0", help="backend:arch, e.g. cuda:80")
+    args = parser.parse_args()
+    backend, arch = args.target.split(":")
+    target = (backend, int(arch))
+    without = run(args.kernels, args.threads, target, pool=False)
+    with_pool = run(args.kernels, args.threads, target, pool=True)
+    print(f"{args.kernels} kernels on {args.threads} threads for {target}")
+    print(f"without context pool: {args.kernels / without:8.1f} kernels/s")
+    print(f"with context pool:    {args.kernels / with_pool:8.1f} kernels/s ({without / with_pool:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
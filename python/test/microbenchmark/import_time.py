@@ -0,0 +1,53 @@
+"""
+Measures the wall time of `import triton` in fresh interpreters and lists the
+modules that take the longest to import (from `python -X importtime`).
+
+    python import_time.py [--reps R] [--top N]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+
+def time_import(module):
+    start = time.perf_counter()
+    subprocess.check_call([sys.executable, "-c", f"import {module}"])
+    return time.perf_counter() - start
+
+
+def slowest_imports(module, top):
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True,
+                          text=True, check=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            # header line
+            continue
+        rows.append((self_us, cumulative_us, fields[2].strip()))
+    return sorted(rows, key=lambda row: row[0], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reps", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    baseline = [time_import("sys") for _ in range(args.reps)]
+    times = [time_import("triton") for _ in range(args.reps)]
+    print(f"python startup:           {statistics.median(baseline) * 1e3:8.1f} ms")
+    print(f"python startup + triton:  {statistics.median(times) * 1e3:8.1f} ms")
+    print("\nslowest modules (self time):")
+    for self_us, cumulative_us, name in slowest_imports("triton", args.top):
+        print(f"  {self_us / 1e3:8.2f} ms  (cumulative {cumulative_us / 1e3:8.2f} ms)  {name}")
+
+
+if __name__ == "__main__":
+    main()
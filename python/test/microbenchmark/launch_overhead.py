@@ -0,0 +1,91 @@
+"""
+Measures the host-side overhead of launching a @triton.jit'd kernel.
+
+Compares the argument binding / cache-key computation that `JITFunction.run`
+used to do (`inspect.Signature.bind` + one `KernelArg` per argument) with the
+generated binder, and reports the end-to-end time of an empty kernel launch.
+
+    python launch_overhead.py [--reps R]
+
+Set `TRITON_DRIVER=null` to run it without a GPU (or torch): kernels then go
+through the real binding and launcher argument marshalling but are never
+executed.
+"""
+import argparse
+import time
+
+import triton
+import triton.language as tl
+from triton.runtime.jit import KernelArg
+
+
+@triton.jit
+def empty_kernel(a0, a1, a2, a3, a4, a5, a6, a7, n0, n1, n2, n3, BLOCK: tl.constexpr):
+    pass
+
+
+class Buffer:
+    """Stands in for a tensor when running on the null driver."""
+    dtype = "float32"
+
+    def __init__(self, ptr):
+        self.ptr = ptr
+
+    def data_ptr(self):
+        return self.ptr
+
+
+def bind_legacy(fn, *args, **kwargs):
+    bound_args = fn.signature.bind(*args, **kwargs)
+    bound_args.apply_defaults()
+    args = [KernelArg(arg_value, param) for (_, arg_value), param in zip(bound_args.arguments.items(), fn.params)]
+    sig_key = tuple(arg.signature_key() for arg in args if not arg.param.is_constexpr)
+    spec_key = tuple(arg.specialization_key() for arg in args if not arg.param.do_not_specialize)
+    constexpr_key = tuple(arg.value for arg in args if arg.param.is_constexpr)
+    launch_args = [arg.value for arg in args if not arg.param.is_constexpr]
+    return sig_key, constexpr_key, spec_key, launch_args
+
+
+def bind_generated(fn, *args, **kwargs):
+    _, sig_key, constexpr_key, spec_key, launch_args = fn.binder(*args, **kwargs)
+    return sig_key, constexpr_key, spec_key, launch_args
+
+
+def time_us(f, reps):
+    f()
+    start = time.perf_counter()
+    for _ in range(reps):
+        f()
+    return (time.perf_counter() - start) / reps * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reps", type=int, default=10000)
+    args = parser.parse_args()
+
+    if triton.runtime.driver.get_current_target()[0] == "null":
+        tensors = [Buffer(1024 * (i + 1)) for i in range(8)]
+        synchronize = lambda: None  # noqa: E731
+    else:
+        import torch
+        tensors = [torch.empty(1024, device="cuda") for _ in range(8)]
+        synchronize = torch.cuda.synchronize
+    ints = [1024, 17, 1, 4096]
+    grid = (1, )
+    # compile once so the launch path below only measures cache hits
+    empty_kernel[grid](*tensors, *ints, BLOCK=128)
+    synchronize()
+
+    legacy = time_us(lambda: bind_legacy(empty_kernel, *tensors, *ints, BLOCK=128), args.reps)
+    generated = time_us(lambda: bind_generated(empty_kernel, *tensors, *ints, BLOCK=128), args.reps)
+    launch = time_us(lambda: empty_kernel[grid](*tensors, *ints, BLOCK=128), args.reps)
+    synchronize()
+
+    print(f"bind + key (Signature.bind + KernelArg): {legacy:8.2f} us")
+    print(f"bind + key (generated binder):           {generated:8.2f} us")
+    print(f"end-to-end launch (cache hit):           {launch:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
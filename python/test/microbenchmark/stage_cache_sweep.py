@@ -0,0 +1,61 @@
+"""
+Measures the total compile time of an autotuning-style sweep of a matmul
+kernel over `num_warps`, `num_stages` and `enable_fp_fusion`, with and without
+the stage cache (`TRITON_STAGE_CACHE`), each starting from an empty cache.
+
+    python stage_cache_sweep.py [--block-sizes 64,128]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+CHILD = """
+import itertools, time, torch, triton, triton.language as tl
+
+@triton.jit
+def matmul(A, B, C, M, N, K, BLOCK_M: tl.constexpr, BLOCK_N: tl.constexpr, BLOCK_K: tl.constexpr):
+    pid_m, pid_n = tl.program_id(0), tl.program_id(1)
+    rm = pid_m * BLOCK_M + tl.arange(0, BLOCK_M)
+    rn = pid_n * BLOCK_N + tl.arange(0, BLOCK_N)
+    rk = tl.arange(0, BLOCK_K)
+    acc = tl.zeros((BLOCK_M, BLOCK_N), dtype=tl.float32)
+    for k in range(0, K, BLOCK_K):
+        a = tl.load(A + rm[:, None] * K + (k + rk)[None, :])
+        b = tl.load(B + (k + rk)[:, None] * N + rn[None, :])
+        acc += tl.dot(a, b)
+    tl.store(C + rm[:, None] * N + rn[None, :], acc)
+
+a = torch.empty((512, 512), dtype=torch.float16, device="cuda")
+c = torch.empty((512, 512), dtype=torch.float32, device="cuda")
+start = time.perf_counter()
+for block, num_warps, num_stages, fp_fusion in itertools.product({blocks}, [4, 8], [2, 3, 4], [True, False]):
+    matmul.warmup(a, a, c, 512, 512, 512, BLOCK_M=block, BLOCK_N=block, BLOCK_K=32, num_warps=num_warps,
+                  num_stages=num_stages, enable_fp_fusion=fp_fusion, grid=(1, ))
+print(time.perf_counter() - start)
+"""
+
+
+def run(blocks, stage_cache):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, TRITON_CACHE_DIR=cache_dir, TRITON_STAGE_CACHE="1" if stage_cache else "0")
+        out = subprocess.check_output([sys.executable, "-c", CHILD.replace("{blocks}", repr(blocks))], env=env)
+    return float(out.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--block-sizes", default="64,128")
+    args = parser.parse_args()
+    blocks = [int(b) for b in args.block_sizes.split(",")]
+    variants = len(blocks) * 2 * 3 * 2
+    without = run(blocks, stage_cache=False)
+    with_cache = run(blocks, stage_cache=True)
+    print(f"{variants} variants")
+    print(f"without stage cache: {without:8.2f} s")
+    print(f"with stage cache:    {with_cache:8.2f} s ({without / with_cache:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Measures time-to-first-launch of many kernels when the on-disk cache is warm
+but the process is new, i.e. the cost of loading compiled kernels from the
+cache (metadata parsing, reading files, building launchers, loading binaries).
+
+A module with `--kernels` distinct kernels is generated, every kernel is
+compiled and launched once in a first process to populate the cache, then new
+processes time the first launch of every kernel.
+
+    python warm_cache_launch.py [--kernels 300] [--reps 3]
+
+Set `TRITON_DRIVER=null` to run it without a GPU.
+"""
+import argparse
+import importlib
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+KERNEL_TEMPLATE = """
+@triton.jit
+def kernel_{i}(X, Y, N, BLOCK: tl.constexpr):
+    offs = tl.program_id(0) * BLOCK + tl.arange(0, BLOCK)
+    mask = offs < N
+    tl.store(Y + offs, tl.load(X + offs, mask=mask) * {i} + 1, mask=mask)
+"""
+
+
+class Buffer:
+    """Stands in for a tensor when running on the null driver."""
+    dtype = "float32"
+
+    def __init__(self, ptr):
+        self.ptr = ptr
+
+    def data_ptr(self):
+        return self.ptr
+
+
+def launch_all(module_dir, num_kernels):
+    """Launches every kernel once; returns the time it took, in seconds."""
+    import triton
+    sys.path.insert(0, module_dir)
+    start = time.perf_counter()
+    kernels = importlib.import_module("warm_cache_kernels")
+    if triton.runtime.driver.get_current_target()[0] == "null":
+        x, y = Buffer(1024), Buffer(2048)
+        synchronize = lambda: None  # noqa: E731
+    else:
+        import torch
+        x, y = torch.empty(1024, device="cuda"), torch.empty(1024, device="cuda")
+        synchronize = torch.cuda.synchronize
+    for i in range(num_kernels):
+        getattr(kernels, f"kernel_{i}")[(1, )](x, y, 1024, BLOCK=128)
+    synchronize()
+    return time.perf_counter() - start
+
+
+def run_child(module_dir, num_kernels, env):
+    code = f"import warm_cache_launch; print(warm_cache_launch.launch_all({module_dir!r}, {num_kernels}))"
+    out = subprocess.check_output([sys.executable, "-c", code], env=env, cwd=os.path.dirname(__file__))
+    return float(out.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--kernels", type=int, default=300)
+    parser.add_argument("--reps", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        module_dir = os.path.join(tmpdir, "module")
+        os.makedirs(module_dir)
+        with open(os.path.join(module_dir, "warm_cache_kernels.py"), "w") as f:
+            f.write("import triton\nimport triton.language as tl\n")
+            for i in range(args.kernels):
+                f.write(KERNEL_TEMPLATE.format(i=i))
+        env = dict(os.environ, TRITON_CACHE_DIR=os.path.join(tmpdir, "cache"))
+        cold = run_child(module_dir, args.kernels, env)
+        warm = [run_child(module_dir, args.kernels, env) for _ in range(args.reps)]
+
+    best = min(warm)
+    print(f"cold cache: {cold:8.2f} s ({cold / args.kernels * 1e3:8.2f} ms / kernel)")
+    print(f"warm cache: {best:8.2f} s ({best / args.kernels * 1e3:8.2f} ms / kernel, best of {args.reps})")
+
+
+if __name__ == "__main__":
+    main()
@@ -99,7 +99,14 @@ def getNameToHashesDict(path: str) -> Dict[str, List[str]]:
         Note: the hashes must have a json file and either a ttir or ttgir file, otherwise they are ignored
     """
     nameToHashes = {}
-    for hash in os.listdir(path):
+    hashes = []
+    for name in os.listdir(path):
+        # caches are sharded by the first two characters of the hash
+        if len(name) == 2 and os.path.isdir(os.path.join(path, name)):
+            hashes += [os.path.join(name, hash) for hash in os.listdir(os.path.join(path, name))]
+        else:
+            hashes.append(name)
+    for hash in hashes:
         fullPath = os.path.join(path, hash)
         if not os.path.isdir(fullPath):
             print(f"Path {fullPath} is not a directory!")
@@ -69,6 +69,33 @@ def test_nested1_change():
     assert baseline != updated
 
 
+def test_cache_key_memoized(monkeypatch):
+    from triton.runtime import jit
+    reset_tmp_dir()
+    kernel.hash = function_1.hash = function_2.hash = None
+    baseline = kernel.cache_key
+    # in one local file, not in cache entries
+    assert os.listdir(tmpdir) == ["__call_paths_v2__.jsonl"]
+
+    def parse(self):
+        raise AssertionError("source should not be parsed again")
+
+    # as in a new process, which reads the call paths from the cache directory
+    monkeypatch.setattr(jit, "_call_paths_index", dict())
+    kernel.hash = function_1.hash = function_2.hash = None
+    with monkeypatch.context() as m:
+        m.setattr(JITFunction, "parse", parse)
+        assert kernel.cache_key == baseline
+    # changing a dependency still changes the key
+    function_2.src = function_2.src.replace('i + 1', 'i + 2')
+    kernel.hash = function_1.hash = None
+    try:
+        assert kernel.cache_key != baseline
+    finally:
+        function_2.src = function_2.src.replace('i + 2', 'i + 1')
+        kernel.hash = function_1.hash = None
+
+
 def write_and_load_module(code, num_extra_lines):
     with tempfile.NamedTemporaryFile(mode='w+', suffix='.py') as f:
         f.write(('# extra line\n' * num_extra_lines) + code)
@@ -135,6 +162,224 @@ def test_specialize(mode):
     assert counter == target
 
 
+def test_binder_matches_kernel_args():
+    from triton.runtime.jit import KernelArg
+
+    @triton.jit(do_not_specialize=["j"])
+    def kernel(X, Y, i, j, flag: bool, BLOCK: tl.constexpr, Z=None):
+        tl.store(X, i)
+
+    x = torch.empty(1, dtype=torch.int32, device='cuda')
+    y = torch.empty(3, dtype=torch.float16, device='cuda')[1:]
+    kernel[(1, )](x, y, 16, 7, True, BLOCK=32)
+    for args, kwargs in [((x, y, 16, 7, True, 32), {}), ((x, y, 1, 8, False), dict(BLOCK=4, Z=x))]:
+        bound_args = kernel.signature.bind(*args, **kwargs)
+        bound_args.apply_defaults()
+        ref = [KernelArg(v, p) for v, p in zip(bound_args.arguments.values(), kernel.params)]
+        values, sig_key, constexpr_key, spec_key, launch_args = kernel.binder(*args, **kwargs)
+        assert values == tuple(bound_args.arguments.values())
+        assert sig_key == tuple(arg.signature_key() for arg in ref if not arg.param.is_constexpr)
+        assert constexpr_key == tuple(arg.value for arg in ref if arg.param.is_constexpr)
+        assert spec_key == tuple(arg.specialization_key() for arg in ref if not arg.param.do_not_specialize)
+        assert launch_args == tuple(arg.value for arg in ref if not arg.param.is_constexpr)
+
+
+def test_concurrent_compile(monkeypatch):
+    import threading
+    from triton.runtime.singleflight import SingleFlight
+
+    @triton.jit
+    def kernel_add(a, b, o, N: tl.constexpr):
+        idx = tl.arange(0, N)
+        tl.store(o + idx, tl.load(a + idx) + tl.load(b + idx))
+
+    compilations = []
+    monkeypatch.setattr(JITFunction, "cache_hook", lambda *args, **kwargs: compilations.append(kwargs["key"]))
+    reset_tmp_dir()
+    kernel_add.compile_flight = SingleFlight()
+    num_threads = 8
+    barrier = threading.Barrier(num_threads)
+    kernels = []
+
+    def warmup():
+        barrier.wait()
+        kernels.append(kernel_add.warmup(torch.float32, torch.float32, torch.float32, 32, grid=(1, )))
+
+    threads = [threading.Thread(target=warmup) for _ in range(num_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    device = torch.cuda.current_device()
+    assert len(kernel_add.cache[device]) == 1
+    assert all(k is kernels[0] for k in kernels)
+    assert len(compilations) == 1
+    stats = kernel_add.compile_flight.stats()
+    assert stats["leaders"] >= 1
+    assert stats["in_flight"] == 0
+
+
+def test_concurrent_compile_same_hash(monkeypatch):
+    import threading
+    from triton.compiler import ASTSource, compiler
+    from triton.runtime.singleflight import SingleFlight
+
+    run_stages = compiler._run_stages
+    compilations = []
+
+    def counting_run_stages(*args, **kwargs):
+        compilations.append(args[4])
+        return run_stages(*args, **kwargs)
+
+    monkeypatch.setattr(compiler, "_run_stages", counting_run_stages)
+    monkeypatch.setattr(compiler, "compile_flight", SingleFlight())
+    reset_tmp_dir()
+    src = ASTSource(kernel, signature={0: "*i32", 1: "i32"}, constants={2: 256})
+    num_threads = 8
+    barrier = threading.Barrier(num_threads)
+    kernels = []
+
+    def compile():
+        barrier.wait()
+        kernels.append(triton.compile(src, target=("cuda", 80), stop_after="ttgir"))
+
+    threads = [threading.Thread(target=compile) for _ in range(num_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(kernels) == num_threads
+    assert len(compilations) == 1
+    assert len({k.metadata.hash for k in kernels}) == 1
+    assert compiler.compile_flight.stats()["in_flight"] == 0
+
+
+def test_compile_async():
+
+    @triton.jit
+    def kernel_add(a, b, o, N: tl.constexpr):
+        idx = tl.arange(0, N)
+        tl.store(o + idx, tl.load(a + idx) + tl.load(b + idx))
+
+    device = torch.cuda.current_device()
+    future = kernel_add.compile_async(torch.float32, torch.float32, torch.float32, 32)
+    kernel = future.result()
+    assert list(kernel_add.cache[device].values()) == [kernel]
+    future = kernel_add.warmup(torch.float32, torch.float32, torch.float32, 32, grid=(1, ), background=True)
+    assert future.result() is kernel
+
+
+def test_compile_async_fallback():
+    from triton.runtime.jit import get_compile_executor, set_compile_executor
+
+    @triton.jit
+    def kernel_add(a, b, o, N: tl.constexpr):
+        idx = tl.arange(0, N)
+        tl.store(o + idx, tl.load(a + idx) + tl.load(b + idx))
+
+    @triton.jit
+    def kernel_add_generic(a, b, o, N: tl.constexpr):
+        idx = tl.arange(0, N)
+        tl.store(o + idx, tl.load(a + idx) + tl.load(b + idx))
+
+    class DeferredExecutor:
+
+        def __init__(self):
+            self.fns = []
+
+        def submit(self, fn):
+            self.fns.append(fn)
+
+    executor = DeferredExecutor()
+    old_executor = get_compile_executor()
+    set_compile_executor(executor)
+    try:
+        a, b, o = [torch.randn(32, dtype=torch.float32, device="cuda") for _ in range(3)]
+        future = kernel_add.compile_async(a, b, o, 32, fallback=kernel_add_generic)
+        kernel_add[(1, )](a, b, o, 32)
+        assert not future.done()
+        assert torch.equal(o, a + b)
+        device = torch.cuda.current_device()
+        assert len(kernel_add.cache[device]) == 0
+        assert len(kernel_add_generic.cache[device]) == 1
+        for fn in executor.fns:
+            fn()
+        assert future.result() is not None
+        assert len(kernel_add.cache[device]) == 1
+    finally:
+        set_compile_executor(old_executor)
+
+
+def test_cache_capacity():
+
+    @triton.jit
+    def kernel(X, BLOCK: tl.constexpr):
+        tl.store(X + tl.arange(0, BLOCK), 1)
+
+    x = torch.empty(64, dtype=torch.int32, device='cuda')
+    device = torch.cuda.current_device()
+    kernel.cache_capacity = 2
+    for block in [1, 2, 1, 4, 1, 8]:
+        kernel[(1, )](x, BLOCK=block)
+    assert sorted(key[1] for key in kernel.cache[device]) == [(1, ), (8, )]
+    stats = kernel.cache_stats()
+    assert stats == {"hits": 2, "misses": 4, "evictions": 2, "size": 2}
+    # evicted kernels are recompiled (or reloaded from disk) and still run
+    evicted = next(k for key, k in kernel.cache[device].items() if key[1] == (1, ))
+    kernel[(1, )](x, BLOCK=4)
+    assert kernel.cache_stats()["evictions"] == 3
+    # and are only unloaded once nothing references them, e.g. a launch on another thread
+    assert evicted.module is not None
+    evicted[(1, )](x)
+
+
+def test_explain_recompiles(monkeypatch):
+    from triton.runtime.recompile import RecompileWarning
+
+    @triton.jit
+    def kernel(X, i, BLOCK: tl.constexpr):
+        tl.store(X, i)
+
+    events = []
+    monkeypatch.setattr(JITFunction, "explain_recompiles", True)
+    monkeypatch.setattr(JITFunction, "recompile_hook", events.append)
+    monkeypatch.setattr(JITFunction, "recompile_limit", (2, 60.0))
+    x = torch.empty(4, dtype=torch.int32, device='cuda')
+    kernel[(1, )](x, 16, BLOCK=32)
+    assert events == []
+    kernel[(1, )](x, 1, BLOCK=32)
+    assert [(c.arg, c.property) for c in events[-1].changes] == [("i", "divisible by 16"), ("i", "divisible by 8"),
+                                                               ("i", "equal to 1")]
+    kernel[(1, )](x[1:], 16, BLOCK=32)
+    assert [(c.arg, c.property) for c in events[-1].changes] == [("X", "divisible by 16")]
+    with pytest.warns(RecompileWarning):
+        kernel[(1, )](x, 16, BLOCK=64)
+    assert [(c.arg, c.property) for c in events[-1].changes] == [("BLOCK", "constexpr value")]
+
+
+def test_specialization_budget():
+    counter = 0
+
+    def inc_counter(*args, **kwargs):
+        nonlocal counter
+        counter += 1
+
+    @triton.jit
+    def kernel(X, i, BLOCK: tl.constexpr):
+        tl.store(X, i)
+
+    JITFunction.cache_hook = inc_counter
+    reset_tmp_dir()
+    kernel.specialization_budget = 3
+    x = torch.empty(1, dtype=torch.int32, device='cuda')
+    for i in [1, 16, 8, 3, 5, 7, 32, 1]:
+        kernel[(1, )](x, i, BLOCK=512)
+    # three specialized variants, then a single generic one
+    assert counter == 4
+    assert kernel.params[1].do_not_specialize
+    assert not kernel.params[0].do_not_specialize
+
+
 def test_annotation():
 
     @triton.jit
@@ -257,3 +502,503 @@ def test_memory_leak() -> None:
         x0 = xindex
         tmp0 = tl.load(in_ptr0 + (x0), xmask)
         tl.store(out_ptr0 + (x0 + tl.zeros([XBLOCK], tl.int32)), tmp0, xmask)
+
+
+def test_triton_key_stamp(monkeypatch):
+    from triton.compiler import compiler
+    from triton.runtime import cache
+    reset_tmp_dir()
+    compiler.triton_key.cache_clear()
+    _, files = compiler._triton_key_files()
+    key = compiler.triton_key()
+    assert key == compiler._compute_triton_key(files)
+    # stored in a local file of the cache directory, not in a (recorded, possibly remote) cache entry
+    assert not cache.cache_entries(tmpdir)
+
+    def compute(files):
+        raise AssertionError("triton_key should be read from its stamp file")
+
+    compiler.triton_key.cache_clear()
+    with monkeypatch.context() as m:
+        m.setattr(compiler, "_compute_triton_key", compute)
+        assert compiler.triton_key() == key
+    compiler.triton_key.cache_clear()
+
+
+def test_cache_size_limit(monkeypatch, tmp_path):
+    import time
+    from triton.runtime import cache
+    monkeypatch.setenv("TRITON_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("TRITON_CACHE_MAX_SIZE", "10K")
+    managers = []
+    for i in range(8):
+        manager = cache.FileCacheManager(f"key{i}")
+        path = manager.put(b"x" * 2000, "kernel.cubin")
+        manager.put_group("kernel.json", {"kernel.cubin": path})
+        last_used = time.time() - 1000 + i
+        os.utime(manager.cache_dir, (last_used, last_used))
+        managers.append(manager)
+    # recently written entries are never evicted
+    assert len(cache.cache_entries()) == 8
+    # using an entry makes it the most recently used one
+    assert managers[0].get_group("kernel.json") is not None
+    assert cache.evict() <= 10 * 2**10
+    assert sorted(entry.key for entry in cache.cache_entries()) == ["key0", "key5", "key6", "key7"]
+    stats = cache.cache_stats()
+    assert stats["entries"] == 4
+    assert stats["stages"]["cubin"] == 4 * 2000
+    # only kernel lookups by `triton.compile` count as hits and misses
+    assert (stats["hits"], stats["misses"]) == (0, 0)
+    removed = cache.prune(older_than=60)
+    assert sorted(entry.key for entry in removed) == ["key5", "key6", "key7"]
+
+
+def test_packed_cache_manager(monkeypatch, tmp_path):
+    from triton.runtime.packed_cache import PackedCacheManager, _packs
+    monkeypatch.setenv("TRITON_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("TRITON_PACK_EXTRACT_DIR", str(tmp_path / "extracted"))
+    for i in range(4):
+        manager = PackedCacheManager(f"key{i}")
+        path = manager.put(b"x" * 100, "kernel.cubin")
+        manager.put_group("kernel.json", {"kernel.cubin": path})
+    assert not any((tmp_path / "cache" / f"key{i}").exists() for i in range(4))
+    # superseded records are dropped by compaction
+    manager.put(b"y" * 100, "kernel.cubin")
+    assert manager.compact() > 100
+    # a fresh process reads everything back from the pack
+    _packs.clear()
+    shutil.rmtree(tmp_path / "extracted")
+    manager = PackedCacheManager("key3")
+    group = manager.get_group("kernel.json")
+    assert list(group) == ["kernel.cubin"]
+    with open(group["kernel.cubin"], "rb") as f:
+        assert f.read() == b"y" * 100
+    assert PackedCacheManager("key0").get_file("kernel.cubin") is not None
+    assert PackedCacheManager("key4").get_group("kernel.json") is None
+    # data of the same length written by a host that extracts elsewhere isn't shadowed by the older file
+    _packs.clear()
+    monkeypatch.setenv("TRITON_PACK_EXTRACT_DIR", str(tmp_path / "other-host"))
+    PackedCacheManager("key3").put(b"z" * 100, "kernel.cubin")
+    _packs.clear()
+    monkeypatch.setenv("TRITON_PACK_EXTRACT_DIR", str(tmp_path / "extracted"))
+    with open(PackedCacheManager("key3").get_group("kernel.json")["kernel.cubin"], "rb") as f:
+        assert f.read() == b"z" * 100
+
+
+def test_cache_sharded_layout(monkeypatch, tmp_path):
+    import json
+    from triton.runtime import cache
+    monkeypatch.setenv("TRITON_CACHE_DIR", str(tmp_path))
+    key = "abcdef0123456789"
+    # an entry written by a version that didn't shard the cache
+    flat_dir = tmp_path / key
+    flat_dir.mkdir()
+    (flat_dir / "kernel.cubin").write_bytes(b"cubin")
+    group = {"child_paths": {"kernel.cubin": str(flat_dir / "kernel.cubin")}}
+    (flat_dir / "__grp__kernel.json").write_text(json.dumps(group))
+    manager = cache.FileCacheManager(key)
+    assert manager.cache_dir == str(tmp_path / "ab" / key)
+    assert not flat_dir.exists()
+    group = manager.get_group("kernel.json")
+    assert group == {"kernel.cubin": str(tmp_path / "ab" / key / "kernel.cubin")}
+    path = cache.FileCacheManager("0123").put(b"x", "kernel.cubin")
+    assert path == str(tmp_path / "01" / "0123" / "kernel.cubin")
+    assert sorted(entry.key for entry in cache.cache_entries()) == ["0123", key]
+
+
+def test_lazy_asm(tmp_path):
+    from triton.compiler.compiler import LazyAsm
+    (tmp_path / "kernel.ttir").write_text("ttir")
+    (tmp_path / "kernel.cubin").write_bytes(b"cubin")
+    asm = LazyAsm({"ttir": tmp_path / "kernel.ttir", "cubin": tmp_path / "kernel.cubin"}, "cubin")
+    assert asm["cubin"] == b"cubin"
+    assert len(asm._loaded) == 1
+    assert sorted(asm) == ["cubin", "ttir"]
+    assert asm["ttir"] == "ttir"
+    assert dict(asm) == {"ttir": "ttir", "cubin": b"cubin"}
+    # stages removed from the cache before they are first read
+    (tmp_path / "kernel.ptx").write_text("ptx")
+    asm = LazyAsm({"ptx": tmp_path / "kernel.ptx", "cubin": tmp_path / "kernel.cubin"}, "cubin")
+    (tmp_path / "kernel.ptx").unlink()
+    assert "ptx" in asm
+    with pytest.raises(FileNotFoundError, match="ptx of this kernel was removed from the cache"):
+        asm["ptx"]
+
+
+def _compile_once(cache_dir, key, compiles_path):
+    import time
+    from triton.runtime.cache import FileCacheManager
+    os.environ["TRITON_CACHE_DIR"] = cache_dir
+    manager = FileCacheManager(key)
+    with manager.lock():
+        if manager.get_group("kernel.json") is None:
+            with open(compiles_path, "a") as f:
+                f.write("compile\n")
+            time.sleep(0.2)
+            path = manager.put(b"cubin", "kernel.cubin")
+            manager.put_group("kernel.json", {"kernel.cubin": path})
+
+
+def test_cache_lock(monkeypatch, tmp_path):
+    import multiprocessing
+    from filelock import FileLock
+    from triton.runtime.cache import FileCacheManager
+    compiles_path = str(tmp_path / "compiles")
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_compile_once, args=(str(tmp_path), "key", compiles_path)) for _ in range(4)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+        assert proc.exitcode == 0
+    with open(compiles_path) as f:
+        assert f.read().count("compile") == 1
+    # a lock that is never released is given up on after the timeout
+    monkeypatch.setenv("TRITON_CACHE_DIR", str(tmp_path))
+    manager = FileCacheManager("key")
+    with FileLock(manager.lock_path):
+        with pytest.warns(UserWarning, match="proceeding without it"):
+            with manager.lock(timeout=0.1):
+                pass
+
+
+def test_remote_cache_manager(monkeypatch, tmp_path):
+    import threading
+    import time
+    from triton.runtime import remote_cache
+    server = remote_cache.make_server(tmp_path / "remote")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        host, port = server.server_address[:2]
+        monkeypatch.setenv("TRITON_REMOTE_CACHE_URL", f"http://{host}:{port}/triton")
+        # a first host compiles the kernel
+        monkeypatch.setenv("TRITON_CACHE_DIR", str(tmp_path / "host0"))
+        manager = remote_cache.RemoteCacheManager("key")
+        path = manager.put(b"cubin", "kernel.cubin")
+        manager.put_group("kernel.json", {"kernel.cubin": path})
+        manager.remote.flush()
+        # another host gets it from the remote store and keeps a local copy
+        monkeypatch.setenv("TRITON_CACHE_DIR", str(tmp_path / "host1"))
+        manager = remote_cache.RemoteCacheManager("key")
+        group = manager.get_group("kernel.json")
+        assert group["kernel.cubin"].startswith(str(tmp_path / "host1"))
+        with open(group["kernel.cubin"], "rb") as f:
+            assert f.read() == b"cubin"
+        assert manager.get_group("other.json") is None
+        # the lookup under the compile lock doesn't ask the store again
+        misses = manager.remote.stats["misses"]
+        assert manager.get_group("other.json") is None
+        assert manager.remote.stats["misses"] == misses
+        assert manager.remote.stats["errors"] == 0
+        # uploads the store can't keep up with are dropped
+        monkeypatch.setattr(remote_cache, "_MAX_PENDING_UPLOADS", 1)
+        store = remote_cache._RemoteStore(f"http://{host}:{port}/triton")
+        release = threading.Event()
+        store._submit(release.wait)
+        while not store.uploads.empty():
+            time.sleep(0.01)
+        store.put("key", "a.cubin", b"a")
+        store.put("key", "b.cubin", b"b")
+        assert store.stats["dropped"] == 1
+        assert not store.flush(timeout=0.1)
+        release.set()
+        assert store.flush(timeout=5)
+        assert store.stats["uploads"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+    # an unreachable store is a miss
+    with pytest.warns(UserWarning, match="unavailable"):
+        assert remote_cache.RemoteCacheManager("other").get_group("kernel.json") is None
+
+
+def test_cache_bundle(monkeypatch, tmp_path):
+    import io
+    import json
+    import sysconfig
+    import tarfile
+    from triton.compiler import compiler
+    from triton.runtime import cache, cache_bundle
+
+    class Backend:
+
+        def __init__(self, version):
+            self.version = version
+
+        def hash(self):
+            return self.version
+
+    monkeypatch.setattr(compiler, "triton_key", lambda: "triton-1")
+    monkeypatch.setattr(compiler, "make_backend", lambda target: Backend("ptxas-1"))
+    monkeypatch.setattr(cache_bundle, "_backend_hashes", dict())
+    monkeypatch.setenv("TRITON_CACHE_DIR", str(tmp_path / "host0"))
+    kernel0, kernel1, launcher = "0" * 32, "1" * 32, "f" * 32
+    with cache_bundle.record_keys() as keys:
+        for key in [kernel0, kernel1]:
+            manager = cache.get_cache_manager(key)
+            metadata = manager.put(json.dumps({"target": ["cuda", 80]}), "kernel.json", binary=False)
+            cubin = manager.put(b"cubin", "kernel.cubin")
+            manager.put_group("kernel.json", {"kernel.json": metadata, "kernel.cubin": cubin})
+        cache.get_cache_manager(launcher).put(b"so", "launcher.so")
+    assert cache._recorded_keys is None
+    exported = cache_bundle.export_bundle(tmp_path / "bundle.tar.gz", keys | {"missing"})
+    assert exported == [kernel0, kernel1, launcher]
+    # another host with a different backend only takes the launcher
+    monkeypatch.setenv("TRITON_CACHE_DIR", str(tmp_path / "host1"))
+    monkeypatch.setattr(cache_bundle, "_backend_hashes", {("cuda", 80): "ptxas-2"})
+    imported, skipped = cache_bundle.import_bundle(tmp_path / "bundle.tar.gz")
+    assert imported == [launcher]
+    assert sorted(skipped) == [kernel0, kernel1]
+    # a matching host takes everything, with groups pointing at its own cache
+    monkeypatch.setattr(cache_bundle, "_backend_hashes", dict())
+    imported, skipped = cache_bundle.import_bundle(tmp_path / "bundle.tar.gz")
+    assert imported == [kernel0, kernel1, launcher] and not skipped
+    group = cache.get_cache_manager(kernel1).get_group("kernel.json")
+    assert group["kernel.cubin"].startswith(str(tmp_path / "host1"))
+    with open(group["kernel.cubin"], "rb") as f:
+        assert f.read() == b"cubin"
+    # a manifest that would write outside of the cache is rejected before anything is written
+    monkeypatch.setenv("TRITON_CACHE_DIR", str(tmp_path / "host2"))
+    for entry in [{"key": "../" + kernel0, "files": ["x"]}, {"key": kernel0, "files": ["../x"]},
+                  {"key": kernel0, "files": [".."]}]:
+        ext_suffix = sysconfig.get_config_var("EXT_SUFFIX")
+        manifest = {"format": cache_bundle.BUNDLE_FORMAT, "triton_key": "triton-1", "entries": [
+            {"key": launcher, "kind": "launcher", "files": ["launcher.so"], "ext_suffix": ext_suffix},
+            dict(entry, kind="launcher", ext_suffix=ext_suffix),
+        ]}
+        members = {"manifest.json": json.dumps(manifest).encode("utf-8"), f"entries/{launcher}/launcher.so": b"so"}
+        members.update({f"entries/{entry['key']}/{name}": b"x" for name in entry["files"]})
+        with tarfile.open(tmp_path / "unsafe.tar", "w") as tar:
+            for name, data in members.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+        with pytest.raises(RuntimeError, match="invalid"):
+            cache_bundle.import_bundle(tmp_path / "unsafe.tar")
+        assert not os.path.exists(tmp_path / "host2")
+
+
+def test_cache_bundle_after_compile(tmp_path):
+    from triton.runtime import cache, cache_bundle
+    reset_tmp_dir()
+    kernel.cache.clear()
+    x = torch.empty(1, dtype=torch.int32, device='cuda')
+    with cache_bundle.record_keys() as keys:
+        compiled = kernel.warmup(x, 1, BLOCK=128, grid=(1, ))
+    # intermediate stages cached along the way are neither recorded nor exported
+    assert len(cache.cache_entries(tmpdir)) > len(keys)
+    exported = cache_bundle.export_bundle(tmp_path / "bundle.tar", keys, tmpdir)
+    assert compiled.metadata.hash in exported
+
+
+def test_compressed_artifacts(monkeypatch, tmp_path):
+    from pathlib import Path
+    from triton.compiler.compiler import LazyAsm
+    from triton.runtime import cache
+    monkeypatch.setenv("TRITON_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("TRITON_CACHE_ARTIFACTS", "compressed")
+    ptx = "// ptx\n" * 1000
+    data, suffix = cache.compress_artifact(ptx)
+    assert len(data) < len(ptx) // 10
+    manager = cache.FileCacheManager("key")
+    path = manager.put(data, f"kernel.ptx{suffix}")
+    assert cache.artifact_stage(os.path.basename(path)) == "ptx"
+    assert cache.read_artifact(path) == ptx.encode("utf-8")
+    asm = LazyAsm({"ptx": Path(path)}, "cubin")
+    assert asm["ptx"] == ptx
+    cache.record_artifacts(len(ptx), len(data), 0.5)
+    stats = cache.cache_stats()
+    assert stats["stages"] == {"ptx": len(data)}
+    assert (stats["ir_bytes_produced"], stats["ir_bytes_stored"]) == (len(ptx), len(data))
+    monkeypatch.setenv("TRITON_CACHE_ARTIFACTS", "everything")
+    with pytest.raises(ValueError):
+        cache.default_cache_artifacts()
+
+
+def test_cache_dedup(monkeypatch, tmp_path):
+    from triton.runtime import cache
+    monkeypatch.setenv("TRITON_CACHE_DIR", str(tmp_path))
+    cubin = os.urandom(8192)
+    paths = [cache.FileCacheManager(f"key{i}").put(cubin, "kernel.cubin") for i in range(4)]
+    assert len({os.stat(path).st_ino for path in paths}) == 1
+    # shared bytes are counted once
+    assert sum(entry.size for entry in cache.cache_entries()) == 8192
+    for entry in sorted(cache.cache_entries(), key=lambda entry: entry.key)[:3]:
+        assert cache._remove_entry(entry, grace_period=0)
+    assert cache.clean(grace_period=0) == 0
+    with open(paths[3], "rb") as f:
+        assert f.read() == cubin
+    # the blob goes away with the last entry that uses it
+    assert cache._remove_entry(cache.cache_entries()[0], grace_period=0)
+    assert cache.clean(grace_period=0) == 8192
+    monkeypatch.setenv("TRITON_CACHE_DEDUP", "0")
+    paths = [cache.FileCacheManager(f"key{i}").put(cubin, "kernel.cubin") for i in range(2)]
+    assert os.stat(paths[0]).st_ino != os.stat(paths[1]).st_ino
+
+
+@triton.jit
+def precompiled_kernel(X, N, BLOCK: tl.constexpr, DTYPE: tl.constexpr):
+    offs = tl.arange(0, BLOCK)
+    tl.store(X + offs, tl.zeros([BLOCK], dtype=DTYPE), mask=offs < N)
+
+
+def test_precompile_manifest(monkeypatch, tmp_path):
+    from triton.runtime import precompile
+    manifest = str(tmp_path / "kernels.jsonl")
+    monkeypatch.setattr(JITFunction, "compile_recorder", precompile.ManifestRecorder(manifest))
+    reset_tmp_dir()
+    x = torch.empty(64, dtype=torch.float32, device="cuda")
+    for block in [64, 128]:
+        precompiled_kernel.warmup(x, 64, BLOCK=block, DTYPE=tl.float32, grid=(1, ))
+        precompiled_kernel.warmup(x, 64, BLOCK=block, DTYPE=tl.float32, grid=(1, ))
+    assert len(precompile.load_manifest(manifest)) == 2
+    # a new machine (or a cleared cache) compiles them up front
+    reset_tmp_dir()
+    assert len(precompile.replay(manifest, verify=True)["missing"]) == 2
+    results = precompile.replay(manifest)
+    assert len(results["compiled"]) == 2 and not results["failed"]
+    assert len(precompile.replay(manifest, verify=True)["cached"]) == 2
+
+
+def test_read_only_cache(monkeypatch, tmp_path):
+    import stat
+    from triton.runtime import cache
+    # a cache populated elsewhere, then moved and made read-only
+    monkeypatch.setenv("TRITON_CACHE_DIR", str(tmp_path / "build"))
+    manager = cache.get_cache_manager("key0")
+    manager.put_group("kernel.json", {"kernel.cubin": manager.put(b"cubin", "kernel.cubin")})
+    shutil.move(tmp_path / "build", tmp_path / "cache")
+    for root, dirs, _ in os.walk(tmp_path / "cache"):
+        for d in dirs:
+            os.chmod(os.path.join(root, d), stat.S_IRUSR | stat.S_IXUSR)
+    monkeypatch.setenv("TRITON_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("TRITON_CACHE_READ_ONLY", "1")
+    monkeypatch.setenv("TRITON_CACHE_SCRATCH_DIR", str(tmp_path / "scratch"))
+    try:
+        manager = cache.get_cache_manager("key0")
+        assert isinstance(manager, cache.ReadOnlyCacheManager)
+        group = manager.get_group("kernel.json")
+        assert group == {"kernel.cubin": str(tmp_path / "cache" / "ke" / "key0" / "kernel.cubin")}
+        assert not (tmp_path / "scratch").exists()
+        # misses are compiled into the scratch cache
+        manager = cache.get_cache_manager("key1")
+        assert manager.get_group("kernel.json") is None
+        with manager.lock():
+            manager.put_group("kernel.json", {"kernel.cubin": manager.put(b"cubin", "kernel.cubin")})
+        group = cache.get_cache_manager("key1").get_group("kernel.json")
+        assert group["kernel.cubin"].startswith(str(tmp_path / "scratch"))
+    finally:
+        for root, dirs, _ in os.walk(tmp_path / "cache"):
+            for d in dirs:
+                os.chmod(os.path.join(root, d), stat.S_IRWXU)
+
+
+def test_compile_log(monkeypatch, tmp_path):
+    import json
+    from triton.runtime import cache
+    log_path = tmp_path / "compile.jsonl"
+    monkeypatch.setenv("TRITON_COMPILE_LOG", str(log_path))
+    reset_tmp_dir()
+    # drops the lookups of earlier tests that are not yet written to the (removed) cache
+    cache.cache_stats()
+    x = torch.empty(1, dtype=torch.int32, device='cuda')
+    compiled = kernel.warmup(x, 1, BLOCK=256, grid=(1, ))
+    assert not compiled.metadata.cache_hit
+    assert {"frontend", "ttir", "ttgir"} <= set(compiled.metadata.stage_times)
+    kernel.cache.clear()
+    compiled = kernel.warmup(x, 1, BLOCK=256, grid=(1, ))
+    assert compiled.metadata.cache_hit
+    events = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert [event["cache_hit"] for event in events] == [False, True]
+    stats = cache.cache_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert events[0]["key"] == events[1]["key"] == compiled.metadata.hash
+    assert events[1]["stage_times"] == events[0]["stage_times"]
+
+
+def test_stage_cache():
+    reset_tmp_dir()
+    x = torch.empty(1, dtype=torch.int32, device='cuda')
+    compiled = kernel.warmup(x, 1, BLOCK=512, num_stages=2, grid=(1, ))
+    assert compiled.metadata.resumed_from is None
+    # the pipeline depends on `num_stages` from TTGIR on
+    compiled = kernel.warmup(x, 1, BLOCK=512, num_stages=3, grid=(1, ))
+    assert compiled.metadata.resumed_from == "ttir"
+    assert "frontend" not in compiled.metadata.stage_times
+    # and on `enable_fp_fusion` only from PTX on
+    compiled = kernel.warmup(x, 1, BLOCK=512, num_stages=3, enable_fp_fusion=False, grid=(1, ))
+    assert compiled.metadata.resumed_from == "llir"
+    assert set(compiled.asm) >= {"ttir", "ttgir", "llir", "ptx", "cubin"}
+
+
+def test_stage_cache_artifacts(monkeypatch):
+    from triton.compiler import ASTSource
+    from triton.runtime import cache
+    src = ASTSource(kernel, signature={0: "*i32", 1: "i32"}, constants={2: 128})
+
+    def compile(num_stages):
+        return triton.compile(src, target=("cuda", 80), options={"num_stages": num_stages}, stop_after="ttgir")
+
+    # the stage cache stores nothing under the minimal policy
+    monkeypatch.setenv("TRITON_CACHE_ARTIFACTS", "minimal")
+    reset_tmp_dir()
+    compile(2)
+    assert compile(3).metadata.resumed_from is None
+    # and compresses the stages under the compressed one
+    monkeypatch.setenv("TRITON_CACHE_ARTIFACTS", "compressed")
+    reset_tmp_dir()
+    cache.cache_stats()
+    compile(2)
+    assert compile(3).metadata.resumed_from == "ttir"
+    files = [name for entry in cache.cache_entries(tmpdir) for name in entry.files]
+    assert "kernel.ttir" not in files and any(cache.artifact_stage(name) == "ttir" for name in files)
+    assert cache.cache_stats()["stage_cache_bytes_stored"] > 0
+
+
+def test_compile_stop_after():
+    from triton.compiler import ASTSource, PartialKernel
+    reset_tmp_dir()
+    src = ASTSource(kernel, signature={0: "*i32", 1: "i32"}, constants={2: 128})
+    # no GPU is needed for a given target
+    partial = triton.compile(src, target=("cuda", 80), stop_after="llir")
+    assert isinstance(partial, PartialKernel)
+    assert sorted(partial.asm) == ["llir", "ttgir", "ttir"]
+    assert partial.metadata.shared is not None
+    assert not partial.metadata.cache_hit
+    assert "define void @kernel" in partial.asm["llir"]
+    assert triton.compile(src, target=("cuda", 80), stop_after="llir").metadata.cache_hit
+    # an earlier stop point is cached separately, from the stages cached above
+    partial = triton.compile(src, target=("cuda", 80), stop_after="ttgir")
+    assert not partial.metadata.cache_hit and partial.metadata.resumed_from == "ttgir"
+    assert sorted(partial.asm) == ["ttgir", "ttir"]
+    with pytest.raises(ValueError):
+        triton.compile(src, target=("cuda", 80), stop_after="sass")
+
+
+def test_context_pool(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from triton.compiler import ASTSource
+    from triton.compiler.compiler import _context_pool
+    monkeypatch.setenv("TRITON_STAGE_CACHE", "0")
+    monkeypatch.setenv("TRITON_CONTEXT_POOL_SIZE", "2")
+    _context_pool.clear()
+
+    def compile(block):
+        src = ASTSource(kernel, signature={0: "*i32", 1: "i32"}, constants={2: block})
+        return triton.compile(src, target=("cuda", 80), stop_after="ttgir").asm["ttgir"]
+
+    reset_tmp_dir()
+    expected = {block: compile(block) for block in [64, 128, 256, 512]}
+    (idle, ) = _context_pool.idle.values()
+    assert len(idle) == 1 and idle[0][1] == 4
+    # compilations on concurrent threads each get their own context
+    reset_tmp_dir()
+    with ThreadPoolExecutor(4) as executor:
+        assert dict(zip(expected, executor.map(compile, expected))) == expected
+    assert 1 <= len(idle) <= 2
+    # and contexts are not kept when the pool is disabled
+    monkeypatch.setenv("TRITON_CONTEXT_POOL_SIZE", "0")
+    _context_pool.clear()
+    reset_tmp_dir()
+    assert compile(64) == expected[64]
+    assert not any(_context_pool.idle.values())
@@ -12,3 +12,50 @@ def test_is_lazy():
     assert triton.runtime.driver._obj is None
     utils = triton.runtime.driver.utils  # noqa: F841
     assert issubclass(triton.runtime.driver._obj.__class__, getattr(triton.backends.driver, "DriverBase"))
+
+
+def test_import_is_lazy():
+    import subprocess
+    code = "\n".join([
+        "import sys, triton",
+        "assert triton.backends.backends._backends is None",
+        "assert 'triton.backends.nvidia.compiler' not in sys.modules",
+        "assert type(sys.modules['triton.language.math']).__name__ == '_LazyModule'",
+    ])
+    subprocess.check_call([sys.executable, "-c", code])
+
+
+def test_null_driver(tmp_path):
+    import os
+    import subprocess
+    import textwrap
+    code = textwrap.dedent("""
+        import triton
+        import triton.language as tl
+        from triton.compiler import CompiledKernel
+
+        class Buffer:
+            dtype = "float32"
+
+            def __init__(self, ptr):
+                self.ptr = ptr
+
+            def data_ptr(self):
+                return self.ptr
+
+        @triton.jit
+        def kernel(X, Y, N, BLOCK: tl.constexpr):
+            offs = tl.program_id(0) * BLOCK + tl.arange(0, BLOCK)
+            tl.store(Y + offs, tl.load(X + offs, mask=offs < N), mask=offs < N)
+
+        launches = []
+        CompiledKernel.launch_enter_hook = lambda *args: launches.append(args)
+        assert triton.runtime.driver.get_current_target() == ("null", 0)
+        kernel[(4, )](Buffer(1024), Buffer(2048), 100, BLOCK=32)
+        kernel[(4, )](Buffer(4096), Buffer(8192), 100, BLOCK=32)
+        assert len(kernel.cache[0]) == 1
+        assert [args[:3] for args in launches] == [(4, 1, 1), (4, 1, 1)]
+        assert [args[-3].data_ptr() for args in launches] == [1024, 4096]
+    """)
+    env = dict(os.environ, TRITON_DRIVER="null", TRITON_CACHE_DIR=str(tmp_path))
+    subprocess.check_call([sys.executable, "-c", code], env=env)
@@ -1,6 +1,7 @@
 import os
 import importlib.util
 import inspect
+from collections.abc import Mapping
 from dataclasses import dataclass
 from .driver import DriverBase
 from .compiler import BaseBackend
@@ -47,4 +48,34 @@ def _discover_backends():
     return backends
 
 
-backends = _discover_backends()
+class _LazyBackends(Mapping):
+    """
+    Maps backend names to `Backend`s. Backends are discovered (i.e. their
+    `compiler.py` and `driver.py` are executed) on first access rather than
+    when `triton` is imported.
+    """
+
+    def __init__(self):
+        self._backends = None
+
+    def _load(self):
+        if self._backends is None:
+            self._backends = _discover_backends()
+        return self._backends
+
+    def __getitem__(self, name):
+        return self._load()[name]
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def __repr__(self):
+        if self._backends is None:
+            return "<backends not yet discovered>"
+        return repr(self._backends)
+
+
+backends = _LazyBackends()
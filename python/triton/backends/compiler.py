@@ -56,6 +56,17 @@ class BaseBackend(metaclass=ABCMeta):
         """
         raise NotImplementedError
 
+    def stage_options(self) -> dict:
+        """
+        Returns a dictionary of entries of the form:
+        ir_name [str] => option names [tuple of str]
+        listing, for the stages added by `add_stages` in order, the options that
+        each stage depends on beyond those of the stages before it. The output of
+        a listed stage is cached and reused by compilations that agree on those
+        options; stages after the first unlisted one are never reused.
+        """
+        return dict()
+
     @abstractmethod
     def load_dialects(self, context):
         """
@@ -0,0 +1,191 @@
+"""
+Generates the C source of the Python extension that launches the kernels of a
+signature. The argument marshalling (parsing the arguments of
+`CompiledKernel.run`, extracting pointers through `data_ptr`, calling the
+launch hooks) is shared by the backends; each backend provides its headers,
+helpers and the body of `_launch`, which hands the arguments to the device.
+"""
+
+
+def ty_to_cpp(ty, ptr_type="uint64_t"):
+    if ty[0] == '*':
+        return ptr_type
+    return {
+        "i1": "int32_t",
+        "i8": "int8_t",
+        "i16": "int16_t",
+        "i32": "int32_t",
+        "i64": "int64_t",
+        "u32": "uint32_t",
+        "u64": "uint64_t",
+        "fp16": "float",
+        "bf16": "float",
+        "fp32": "float",
+        "f32": "float",
+        "fp64": "double",
+    }[ty]
+
+
+def _extracted_type(ty):
+    if ty[0] == '*':
+        return "PyObject*"
+    return {
+        'i1': 'int32_t',
+        'i32': 'int32_t',
+        'i64': 'int64_t',
+        'u32': 'uint32_t',
+        'u64': 'uint64_t',
+        'fp16': 'float',
+        'bf16': 'float',
+        'fp32': 'float',
+        'f32': 'float',
+        'fp64': 'double',
+    }[ty]
+
+
+def _format_of(ty):
+    return {
+        "PyObject*": "O",
+        "float": "f",
+        "double": "d",
+        "long": "l",
+        "uint32_t": "I",
+        "int32_t": "i",
+        "uint64_t": "K",
+        "int64_t": "L",
+    }[ty]
+
+
+def make_launcher_src(constants, signature, ids, launch_body, headers="", helpers="", ptr_type="uint64_t",
+                      stream_type="uint64_t", function_type="uint64_t", check_pointer="", desc_start_idx=None):
+    """
+    Returns the source of the launcher of `signature`.
+
+    `_launch(gridX, ..., stream, function, args...)` has `void *params[]`, the
+    addresses of the kernel parameters, in scope when `launch_body` runs.
+    `check_pointer` runs after a pointer is extracted from an object with
+    `data_ptr` and may reject it by setting `ptr_info.valid = false`. Arguments
+    from `desc_start_idx` on are backend-specific descriptors (e.g. CUDA
+    tensor maps), always passed to the kernel.
+    """
+    arg_decls = ', '.join(f"{ty_to_cpp(ty, ptr_type)} arg{i}" for i, ty in signature.items())
+    format = "iiiiiiiiiKKOOO" + ''.join([_format_of(_extracted_type(ty)) for ty in signature.values()])
+
+    # generate glue code
+    folded_without_constexprs = [c for c in ids['ids_of_folded_args'] if c not in ids['ids_of_const_exprs']]
+    params = [
+        i for i in signature.keys() if (desc_start_idx is not None and i >= desc_start_idx) or (
+            i not in constants and i not in folded_without_constexprs)
+    ]
+    src = f"""{headers}
+#include <stdbool.h>
+#include <stdint.h>
+#include <Python.h>
+{helpers}
+static void _launch(int gridX, int gridY, int gridZ, int num_warps, int num_ctas, int clusterDimX, int clusterDimY, int clusterDimZ, int shared_memory, {stream_type} stream, {function_type} function{', ' + arg_decls if len(arg_decls) > 0 else ''}) {{
+  void *params[] = {{ {', '.join(f"&arg{i}" for i in params)} }};
+{launch_body}
+}}
+
+typedef struct _DevicePtrInfo {{
+    {ptr_type} dev_ptr;
+    bool valid;
+}} DevicePtrInfo;
+
+static inline DevicePtrInfo getPointer(PyObject *obj, int idx) {{
+  DevicePtrInfo ptr_info;
+  ptr_info.dev_ptr = 0;
+  ptr_info.valid = true;
+  if (PyLong_Check(obj)) {{
+    ptr_info.dev_ptr = PyLong_AsUnsignedLongLong(obj);
+    return ptr_info;
+  }}
+  if (obj == Py_None) {{
+    // valid nullptr
+    return ptr_info;
+  }}
+  PyObject *ptr = PyObject_GetAttrString(obj, "data_ptr");
+  if(ptr){{
+    PyObject *empty_tuple = PyTuple_New(0);
+    PyObject *ret = PyObject_Call(ptr, empty_tuple, NULL);
+    Py_DECREF(empty_tuple);
+    Py_DECREF(ptr);
+    if (!PyLong_Check(ret)) {{
+      PyErr_SetString(PyExc_TypeError, "data_ptr method of Pointer object must return 64-bit int");
+      ptr_info.valid = false;
+      return ptr_info;
+    }}
+    ptr_info.dev_ptr = PyLong_AsUnsignedLongLong(ret);
+    Py_DECREF(ret);
+{check_pointer}
+    return ptr_info;
+  }}
+  PyErr_SetString(PyExc_TypeError, "Pointer argument must be either uint64 or have data_ptr method");
+  ptr_info.valid = false;
+  return ptr_info;
+}}
+
+static PyObject* launch(PyObject* self, PyObject* args) {{
+  int gridX, gridY, gridZ;
+  uint64_t _stream;
+  uint64_t _function;
+  int num_warps;
+  int num_ctas;
+  int clusterDimX;
+  int clusterDimY;
+  int clusterDimZ;
+  int shared_memory;
+  PyObject *launch_enter_hook = NULL;
+  PyObject *launch_exit_hook = NULL;
+  PyObject *compiled_kernel = NULL;
+  {' '.join([f"{_extracted_type(ty)} _arg{i}; " for i, ty in signature.items()])}
+  if(!PyArg_ParseTuple(args, \"{format}\", &gridX, &gridY, &gridZ, &num_warps, &num_ctas, &clusterDimX, &clusterDimY, &clusterDimZ, &shared_memory, &_stream, &_function, &launch_enter_hook, &launch_exit_hook, &compiled_kernel{', ' + ', '.join(f"&_arg{i}" for i, ty in signature.items()) if len(signature) > 0 else ''})) {{
+    return NULL;
+  }}
+
+  if (launch_enter_hook != Py_None && !PyObject_CallObject(launch_enter_hook, args)) {{
+    return NULL;
+  }}
+
+
+  // raise exception asap
+  {"; ".join([f"DevicePtrInfo ptr_info{i} = getPointer(_arg{i}, {i}); if (!ptr_info{i}.valid) return NULL;" if ty[0] == "*" else "" for i, ty in signature.items()])};
+  Py_BEGIN_ALLOW_THREADS;
+  _launch(gridX, gridY, gridZ, num_warps, num_ctas, clusterDimX, clusterDimY, clusterDimZ, shared_memory, ({stream_type})_stream, ({function_type})_function{', ' + ', '.join(f"ptr_info{i}.dev_ptr" if ty[0]=="*" else f"_arg{i}"for i, ty in signature.items()) if len(signature) > 0 else ''});
+  Py_END_ALLOW_THREADS;
+  if (PyErr_Occurred()) {{
+    return NULL;
+  }}
+
+  if (launch_exit_hook != Py_None && !PyObject_CallObject(launch_exit_hook, args)) {{
+    return NULL;
+  }}
+
+  // return None
+  Py_INCREF(Py_None);
+  return Py_None;
+}}
+
+static PyMethodDef ModuleMethods[] = {{
+  {{"launch", launch, METH_VARARGS, "Entry point for all kernels with this signature"}},
+  {{NULL, NULL, 0, NULL}} // sentinel
+}};
+
+static struct PyModuleDef ModuleDef = {{
+  PyModuleDef_HEAD_INIT,
+  \"__triton_launcher\",
+  NULL, //documentation
+  -1, //size
+  ModuleMethods
+}};
+
+PyMODINIT_FUNC PyInit___triton_launcher(void) {{
+  PyObject *m = PyModule_Create(&ModuleDef);
+  if(m == NULL) {{
+    return NULL;
+  }}
+  PyModule_AddFunctions(m, ModuleMethods);
+  return m;
+}}
+"""
+    return src
@@ -1,4 +1,6 @@
-from .compiler import CompiledKernel, ASTSource, compile, AttrsDescriptor, make_backend
+from .compiler import CompiledKernel, PartialKernel, ASTSource, compile, AttrsDescriptor, make_backend
 from .errors import CompilationError
 
-__all__ = ["compile", "make_backend", "ASTSource", "AttrsDescriptor", "CompiledKernel", "CompilationError"]
+__all__ = [
+    "compile", "make_backend", "ASTSource", "AttrsDescriptor", "CompiledKernel", "PartialKernel", "CompilationError"
+]
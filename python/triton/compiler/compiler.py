@@ -5,16 +5,25 @@ from .._C.libtriton import get_env_vars, ir
 from ..backends import backends
 from .. import __version__
 from ..runtime.autotuner import OutOfResources
-from ..runtime.cache import get_cache_manager
+from ..runtime.cache import (artifact_stage, compress_artifact, default_cache_artifacts, default_cache_dir,
+                             default_cache_read_only, get_cache_manager, read_artifact, record_artifacts,
+                             record_lookup)
 from ..runtime.driver import driver
-# TODO: this shouldn't be here
-from ..backends.nvidia.compiler import InfoFromBackendForTensorMap
+from ..runtime.singleflight import SingleFlight
+from collections.abc import Mapping
 from dataclasses import dataclass
 from .code_generator import ast_to_ttir
 from pathlib import Path
+from typing import Dict
+import contextlib
 import re
 import functools
 import os
+import socket
+import tempfile
+import threading
+import time
+import weakref
 
 
 @dataclass
@@ -156,38 +165,170 @@ class IRSource:
         return dict()
 
 
-@functools.lru_cache()
-def triton_key():
+# deduplicates concurrent compilations of the same kernel hash within this process
+compile_flight = SingleFlight()
+
+
+def _triton_key_files():
     import pkgutil
     TRITON_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    contents = []
     # frontend
-    with open(__file__, "rb") as f:
-        contents += [hashlib.sha1(f.read()).hexdigest()]
+    files = [__file__]
     # compiler
     compiler_path = os.path.join(TRITON_PATH, 'compiler')
     backends_path = os.path.join(TRITON_PATH, 'compiler', 'backends')
     for lib in pkgutil.iter_modules([compiler_path, backends_path]):
-        with open(lib.module_finder.find_spec(lib.name).origin, "rb") as f:
-            contents += [hashlib.sha1(f.read()).hexdigest()]
+        files.append(lib.module_finder.find_spec(lib.name).origin)
     # backend
-    libtriton_hash = hashlib.sha1()
-    with open(os.path.join(TRITON_PATH, "_C/libtriton.so"), "rb") as f:
-        while True:
-            chunk = f.read(1024**2)
-            if not chunk:
-                break
-            libtriton_hash.update(chunk)
-    contents.append(libtriton_hash.hexdigest())
+    files.append(os.path.join(TRITON_PATH, "_C/libtriton.so"))
     # language
     language_path = os.path.join(TRITON_PATH, 'language')
     for lib in pkgutil.iter_modules([language_path]):
-        with open(lib.module_finder.find_spec(lib.name).origin, "rb") as f:
-            contents += [hashlib.sha1(f.read()).hexdigest()]
+        files.append(lib.module_finder.find_spec(lib.name).origin)
+    return TRITON_PATH, files
+
+
+def _triton_key_stamps(files):
+    stamps = []
+    for path in files:
+        st = os.stat(path)
+        stamps.append([path, st.st_size, st.st_mtime_ns, st.st_ino])
+    return stamps
+
+
+def _compute_triton_key(files):
+    contents = []
+    for path in files:
+        file_hash = hashlib.sha1()
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(1024**2)
+                if not chunk:
+                    break
+                file_hash.update(chunk)
+        contents.append(file_hash.hexdigest())
     return f'{__version__}' + '-'.join(contents)
 
 
-def compile(src, target=None, options=None):
+def _read_triton_key(path, stamps):
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != __version__ or data.get("stamps") != stamps:
+        return None
+    return data.get("key")
+
+
+def _triton_key_cache_path(triton_path):
+    # a local file rather than a cache entry: it is read by every process, so
+    # it must not go through `TRITON_CACHE_MANAGER` (e.g. a remote cache) or be
+    # recorded for bundles
+    cache_dir = os.getenv("TRITON_CACHE_DIR", "").strip() or default_cache_dir()
+    digest = hashlib.sha256(triton_path.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"__triton_key_{digest}__.json")
+
+
+def _write_triton_key(path, stamps, key):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp.pid_{os.getpid()}_{threading.get_ident()}"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": __version__, "stamps": stamps, "key": key}, f)
+    os.replace(tmp_path, path)
+
+
+def precompute_triton_key(path=None):
+    """
+    Computes `triton_key()` and stores it, together with the size, mtime and
+    inode of every file it hashes, in `path` (by default `_C/triton_key.json`
+    inside the installed package). Run by `setup.py install` and `develop`;
+    other installers (e.g. of wheels) can run
+    `python -c "from triton.compiler.compiler import precompute_triton_key; precompute_triton_key()"`.
+    """
+    triton_path, files = _triton_key_files()
+    if path is None:
+        path = os.path.join(triton_path, "_C", "triton_key.json")
+    stamps = _triton_key_stamps(files)
+    key = _compute_triton_key(files)
+    _write_triton_key(path, stamps, key)
+    return key
+
+
+@functools.lru_cache()
+def triton_key():
+    """
+    Hash of the Triton installation (frontend, compiler, libtriton and language modules).
+
+    Hashing libtriton.so is slow, so the key is persisted together with the
+    path, size, mtime and inode of the hashed files, either at install time by
+    `precompute_triton_key` or in a file of the cache directory on first use,
+    and only recomputed when one of those changes.
+    """
+    triton_path, files = _triton_key_files()
+    try:
+        stamps = _triton_key_stamps(files)
+    except OSError:
+        stamps = None
+    if stamps is not None:
+        key = _read_triton_key(os.path.join(triton_path, "_C", "triton_key.json"), stamps)
+        if key is not None:
+            return key
+        key = _read_triton_key(_triton_key_cache_path(triton_path), stamps)
+        if key is not None:
+            return key
+    key = _compute_triton_key(files)
+    if stamps is not None and not default_cache_read_only():
+        try:
+            _write_triton_key(_triton_key_cache_path(triton_path), stamps, key)
+        except OSError:
+            pass
+    return key
+
+
+# opt-in log of compilations, one JSON object per line (see `_log_compile`)
+_compile_log_lock = threading.Lock()
+
+
+def _log_compile(src, target, hash, metadata, seconds):
+    path = os.getenv("TRITON_COMPILE_LOG", "").strip()
+    if not path:
+        return
+    event = {
+        "time": time.time(),
+        "host": socket.gethostname(),
+        "pid": os.getpid(),
+        "triton_version": __version__,
+        "name": metadata.get("name", src.name),
+        "key": hash,
+        "target": target,
+        "num_warps": metadata.get("num_warps"),
+        "num_stages": metadata.get("num_stages"),
+        "cache_hit": metadata["cache_hit"],
+        "resumed_from": metadata.get("resumed_from"),
+        "stop_after": metadata.get("stop_after"),
+        "seconds": seconds,
+        # of the compilation that produced the kernel (possibly in another process)
+        "stage_times": metadata.get("stage_times"),
+    }
+    line = json.dumps(event, default=str) + "\n"
+    try:
+        with _compile_log_lock, open(path, "a") as f:
+            f.write(line)
+    except OSError:
+        pass
+
+
+def compile(src, target=None, options=None, stop_after=None):
+    """
+    Compiles `src` for `target` (the current device by default). With
+    `stop_after` set to the name of a stage (e.g. `"ttgir"`), the pipeline
+    ends after that stage and a `PartialKernel` is returned instead of a
+    `CompiledKernel`. Partial compilations up to the stages that the backend
+    lists in `stage_options` (e.g. TTIR, TTGIR and LLIR for CUDA) need neither
+    a GPU (given `target`) nor the backend's tools such as `ptxas`.
+    """
+    start = time.perf_counter()
     if target is None:
         target = driver.get_current_target()
     backend = make_backend(target)
@@ -197,17 +338,213 @@ def compile(src, target=None, options=None):
         src = IRSource(src)
     extra_options = src.parse_options()
     options = backend.parse_options(dict(options or dict(), **extra_options))
+    if stop_after is not None:
+        stages = dict()
+        backend.add_stages(stages, options)
+        exts = list(stages)
+        if stop_after not in exts[exts.index(src.ext):]:
+            raise ValueError(f"cannot stop after stage {stop_after!r} when compiling from {src.ext}; "
+                             f"expected one of {exts[exts.index(src.ext):]}")
     # create cache manager
-    key = f"{triton_key()}-{src.hash()}-{backend.hash()}-{options.hash()}-{str(sorted(get_env_vars().items()))}"
-    hash = hashlib.md5(key.encode("utf-8")).hexdigest()
+    hash = _compile_cache_key(src, backend, options, stop_after)
     fn_cache_manager = get_cache_manager(hash)
     metadata_filename = f"{src.name}.json"
     metadata_group = fn_cache_manager.get_group(metadata_filename) or {}
     metadata_path = metadata_group.get(metadata_filename)
-    if metadata_path is not None:
-        # cache hit!
-        metadata = json.loads(Path(metadata_path).read_text())
-        return CompiledKernel(src, metadata_group)
+    cache_hit = metadata_path is not None
+    record_lookup(cache_hit)
+    if not cache_hit:
+        # cache miss: only one thread of this process compiles a given hash,
+        # the others wait for it and then load the cached artifacts
+        metadata_group = compile_flight.do(
+            hash, lambda: _compile_to_cache(src, target, backend, options, hash, fn_cache_manager, stop_after))
+        metadata_path = metadata_group[metadata_filename]
+    metadata = json.loads(Path(metadata_path).read_text())
+    metadata["cache_hit"] = cache_hit
+    _log_compile(src, target, hash, metadata, time.perf_counter() - start)
+    if stop_after is not None:
+        return PartialKernel(src, metadata_group, metadata)
+    # return handle to compiled kernel
+    return CompiledKernel(src, metadata_group, metadata)
+
+
+def _compile_cache_key(src, backend, options, stop_after=None):
+    env_vars = str(sorted(get_env_vars().items()))
+    if stop_after is None:
+        key = f"{triton_key()}-{src.hash()}-{backend.hash()}-{options.hash()}-{env_vars}"
+    else:
+        # the stages listed in `stage_options` don't depend on the backend's tools
+        backend_key = str(backend.target) if stop_after in backend.stage_options() else backend.hash()
+        key = f"{triton_key()}-{src.hash()}-{backend_key}-{options.hash()}-{env_vars}-{stop_after}"
+    return hashlib.md5(key.encode("utf-8")).hexdigest()
+
+
+def _compile_to_cache(src, target, backend, options, hash, fn_cache_manager, stop_after=None):
+    metadata_filename = f"{src.name}.json"
+    # other processes wait for the one that compiles a given hash
+    with fn_cache_manager.lock():
+        # a concurrent compilation may have populated the cache in the meantime
+        metadata_group = fn_cache_manager.get_group(metadata_filename) or {}
+        if metadata_group.get(metadata_filename) is not None:
+            return metadata_group
+        return _run_stages(src, target, backend, options, hash, fn_cache_manager, metadata_group, stop_after)
+
+
+# options read by the frontend (`ast_to_ttir`), which all stages depend on
+_FRONTEND_OPTIONS = ("debug", "allow_fp8e4nv", "max_num_imprecise_acc_default")
+_MISSING = object()
+
+
+class _StageCache:
+    """
+    Caches the output of the intermediate stages of a compilation under a key
+    made only of the options it depends on (see `BaseBackend.stage_options`),
+    so that compilations that differ in options of later stages (e.g. an
+    autotuner sweeping over `num_stages`) resume after the deepest stage they
+    share instead of starting over from the AST. Disabled by
+    `TRITON_STAGE_CACHE=0` and by `TRITON_CACHE_ARTIFACTS=minimal`; stages are
+    compressed under `TRITON_CACHE_ARTIFACTS=compressed`.
+
+    Each stage is a cache entry holding its output and what the stages up to
+    it added to the metadata (in `<name>.stage.json`, so that the entry isn't
+    mistaken for a kernel, e.g. by `cache_bundle`). Their keys are not
+    recorded by `TRITON_CACHE_RECORD_KEYS`.
+    """
+
+    def __init__(self, src, backend, options, exts, metadata):
+        self.src = src
+        self.metadata_filename = f"{src.name}.stage.json"
+        # ext -> key, for the stages whose output can be reused
+        self.keys = dict()
+        self.compress = default_cache_artifacts() == "compressed"
+        if os.getenv("TRITON_STAGE_CACHE", "1") == "0" or default_cache_artifacts() == "minimal":
+            return
+        stage_options = backend.stage_options()
+        fields = list(_FRONTEND_OPTIONS)
+        # the listed stages don't depend on the backend's tools (e.g. `ptxas`), only on the target
+        base = f"{triton_key()}-{src.hash()}-{src.ext}-{backend.target}-{str(sorted(get_env_vars().items()))}"
+        for ext in exts:
+            if ext not in stage_options:
+                break
+            fields += stage_options[ext]
+            values = [(field, getattr(options, field, None)) for field in fields]
+            self.keys[ext] = hashlib.md5(f"{base}-{ext}-{values}".encode("utf-8")).hexdigest()
+        self.initial_metadata = json.loads(json.dumps(metadata, default=vars))
+
+    def _lookup(self, ext):
+        group = get_cache_manager(self.keys[ext], record=False).get_group(self.metadata_filename) or {}
+        # compressed or not, depending on the policy when it was stored
+        paths = [p for c, p in group.items() if c != self.metadata_filename and artifact_stage(c) == ext]
+        if self.metadata_filename not in group or not paths:
+            return None
+        return paths[0], json.loads(Path(group[self.metadata_filename]).read_text())
+
+    def read(self, ext):
+        """Returns the text of the cached output of stage `ext`, if any."""
+        found = self._lookup(ext) if ext in self.keys else None
+        return None if found is None else read_artifact(found[0]).decode("utf-8")
+
+    def resume(self, context, exts):
+        """
+        Returns the deepest cached stage among `exts`, its output (parsed, if
+        it is MLIR) and the metadata it added, or None.
+        """
+        for ext in reversed([ext for ext in exts if ext in self.keys]):
+            found = self._lookup(ext)
+            if found is None:
+                continue
+            path, stage_metadata = found
+            if not stage_metadata["mlir"]:
+                return ext, read_artifact(path).decode("utf-8"), stage_metadata["metadata"]
+            if os.path.basename(path) == f"{self.src.name}.{ext}":
+                module = ir.parse_mlir_module(path, context, keep_locations=True)
+            else:
+                # the parser reads from a file: decompress it into one
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    tmp_path = os.path.join(tmp_dir, f"{self.src.name}.{ext}")
+                    Path(tmp_path).write_bytes(read_artifact(path))
+                    module = ir.parse_mlir_module(tmp_path, context, keep_locations=True)
+            module.context = context
+            return ext, module, stage_metadata["metadata"]
+        return None
+
+    def put(self, ext, module, metadata) -> int:
+        """Stores the output of stage `ext`; returns the number of bytes written."""
+        if ext not in self.keys:
+            return 0
+        manager = get_cache_manager(self.keys[ext], record=False)
+        filename = f"{self.src.name}.{ext}"
+        mlir = isinstance(module, ir.module)
+        # with locations, so that resumed compilations keep line info
+        data = module.str() if mlir else module
+        if self.compress:
+            data, suffix = compress_artifact(data)
+            filename += suffix
+        metadata = json.loads(json.dumps(metadata, default=vars))
+        added = {k: v for k, v in metadata.items() if self.initial_metadata.get(k, _MISSING) != v}
+        stage_metadata = json.dumps({"mlir": mlir, "metadata": added})
+        group = {
+            filename: manager.put(data, filename),
+            self.metadata_filename: manager.put(stage_metadata, self.metadata_filename, binary=False),
+        }
+        manager.put_group(self.metadata_filename, group)
+        return len(data) + len(stage_metadata)
+
+
+class _ContextPool:
+    """
+    MLIR contexts with the dialects of a backend loaded, reused across
+    compilations instead of creating one per compilation. A context is used
+    by one compilation at a time and each compilation erases its module before
+    returning the context. Types, attributes and the diagnostic handlers that
+    `pass_manager.enable_debug` registers accumulate in a context though, so
+    contexts are retired after `max_uses` compilations, and after a failed one.
+
+    At most `TRITON_CONTEXT_POOL_SIZE` idle contexts are kept per backend (by
+    default as many as `JITFunction.compile_async` threads); 0 disables the pool.
+    """
+
+    def __init__(self, max_uses=64):
+        self.max_uses = max_uses
+        self.lock = threading.Lock()
+        # backend class -> [(context, uses)]
+        self.idle = dict()
+
+    def size(self):
+        size = os.getenv("TRITON_CONTEXT_POOL_SIZE", "").strip()
+        if size:
+            return int(size)
+        return int(os.getenv("TRITON_COMPILE_THREADS", "0")) or min(8, os.cpu_count() or 1)
+
+    @contextlib.contextmanager
+    def context(self, backend):
+        kind = type(backend)
+        with self.lock:
+            idle = self.idle.get(kind)
+            context, uses = idle.pop() if idle else (None, 0)
+        if context is None:
+            context = ir.context()
+            ir.load_dialects(context)
+            backend.load_dialects(context)
+        # on exceptions, the context is dropped with whatever the compilation left in it
+        yield context
+        uses += 1
+        if uses < self.max_uses:
+            with self.lock:
+                idle = self.idle.setdefault(kind, [])
+                if len(idle) < self.size():
+                    idle.append((context, uses))
+
+    def clear(self):
+        with self.lock:
+            self.idle.clear()
+
+
+_context_pool = _ContextPool()
+
+
+def _run_stages(src, target, backend, options, hash, fn_cache_manager, metadata_group, stop_after=None):
+    metadata_filename = f"{src.name}.json"
     # initialize metadata
     metadata = {
         "hash": hash,
@@ -220,20 +557,85 @@ def compile(src, target=None, options=None):
     stages = dict()
     backend.add_stages(stages, options)
     first_stage = list(stages.keys()).index(src.ext)
-    context = ir.context()
-    ir.load_dialects(context)
-    backend.load_dialects(context)
-    module = src.make_ir(options, context)
-    for ext, compile_ir in list(stages.items())[first_stage:]:
-        next_module = compile_ir(module, metadata)
-        metadata_group[f"{src.name}.{ext}"] = fn_cache_manager.put(next_module, f"{src.name}.{ext}")
-        module = next_module
+    pipeline = list(stages.items())[first_stage:]
+    # the output of the last stage (the binary) is the kernel itself
+    stage_cache = _StageCache(src, backend, options, [ext for ext, _ in pipeline[:-1]], metadata)
+    if stop_after is not None:
+        pipeline = pipeline[:[ext for ext, _ in pipeline].index(stop_after) + 1]
+    artifacts = default_cache_artifacts()
+    ir_produced, ir_stored, ir_store_time = 0, 0, 0.0
+    # bytes written to the stage cache, on top of `ir_stored`
+    stage_stored = 0
+
+    def store_ir(ext, module):
+        nonlocal ir_produced, ir_stored, ir_store_time
+        filename = f"{src.name}.{ext}"
+        start = time.perf_counter()
+        data = module if isinstance(module, bytes) else str(module)
+        ir_produced += len(data)
+        if artifacts == "compressed":
+            data, suffix = compress_artifact(data)
+            metadata_group[filename + suffix] = fn_cache_manager.put(data, filename + suffix)
+            ir_stored += len(data)
+        elif artifacts == "all":
+            metadata_group[filename] = fn_cache_manager.put(data, filename)
+            ir_stored += len(data)
+        ir_store_time += time.perf_counter() - start
+
+    # wall time of the frontend and of each stage, in seconds
+    stage_times = dict()
+    with _context_pool.context(backend) as context:
+        start = time.perf_counter()
+        resumed = stage_cache.resume(context, [ext for ext, _ in pipeline])
+        if resumed is not None:
+            resumed_from, module, added_metadata = resumed
+            metadata.update(added_metadata)
+            stage_times["stage_cache"] = time.perf_counter() - start
+            first = [ext for ext, _ in pipeline].index(resumed_from) + 1
+            for ext, _ in pipeline[:first - 1]:
+                text = stage_cache.read(ext)
+                if text is not None:
+                    store_ir(ext, text)
+            if first == len(pipeline):
+                # a partial compilation that is entirely cached
+                filename = f"{src.name}.{resumed_from}"
+                metadata_group[filename] = fn_cache_manager.put(str(module), filename)
+            else:
+                store_ir(resumed_from, module)
+        else:
+            resumed_from, first = None, 0
+            module = src.make_ir(options, context)
+            if isinstance(src, ASTSource):
+                stage_times["frontend"] = time.perf_counter() - start
+        # the stages transform the MLIR module in place
+        root = module
+        for i, (ext, compile_ir) in enumerate(pipeline[first:], first):
+            start = time.perf_counter()
+            next_module = compile_ir(module, metadata)
+            stage_times[ext] = time.perf_counter() - start
+            if i == len(pipeline) - 1:
+                # the binary, or the output of `stop_after`
+                filename = f"{src.name}.{ext}"
+                metadata_group[filename] = fn_cache_manager.put(next_module, filename)
+                if stop_after is not None:
+                    stage_stored += stage_cache.put(ext, next_module, metadata)
+            else:
+                stage_stored += stage_cache.put(ext, next_module, metadata)
+                store_ir(ext, next_module)
+            module = next_module
+        # free the IR now rather than with the context, which goes back to the pool
+        if isinstance(root, ir.module):
+            root.erase()
+        root = module = next_module = resumed = None
+    record_artifacts(ir_produced, ir_stored, ir_store_time, stage_stored)
+    metadata["stage_times"] = {ext: round(seconds, 6) for ext, seconds in stage_times.items()}
+    metadata["resumed_from"] = resumed_from
+    metadata["stop_after"] = stop_after
     # write-back metadata
     metadata_group[metadata_filename] = fn_cache_manager.put(json.dumps(metadata, default=vars), metadata_filename,
                                                              binary=False)
     fn_cache_manager.put_group(metadata_filename, metadata_group)
-    # return handle to compiled kernel
-    return CompiledKernel(src, metadata_group)
+    return metadata_group
 
 
 def make_backend(target):
@@ -244,6 +646,75 @@ def make_backend(target):
     return actives[0](target)
 
 
+class LazyAsm(Mapping):
+    """
+    Maps the name of each stage of a compilation to its output: text for the
+    intermediate representations and bytes for the binary. Only the binary is
+    needed to launch a kernel, so files are read (and decompressed) on first
+    access.
+    """
+
+    def __init__(self, paths: Dict[str, Path], binary_ext: str):
+        self._paths = paths
+        self._binary_ext = binary_ext
+        self._loaded = dict()
+
+    def __getitem__(self, ext):
+        if ext not in self._loaded:
+            path = self._paths[ext]
+            try:
+                data = read_artifact(path)
+            except FileNotFoundError as e:
+                # e.g. evicted (`TRITON_CACHE_MAX_SIZE`) or pruned since the kernel was loaded
+                raise FileNotFoundError(f"the {ext} of this kernel was removed from the cache since it was loaded "
+                                        f"({path}); compile it again to regenerate it") from e
+            self._loaded[ext] = data if ext == self._binary_ext else data.decode("utf-8")
+        return self._loaded[ext]
+
+    def __contains__(self, ext):
+        return ext in self._paths
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __repr__(self):
+        return f"LazyAsm({list(self._paths)})"
+
+
+class PartialKernel:
+    """
+    Result of `compile(..., stop_after=stage)`: the IR of the stages up to
+    `stage` (in `asm`) and the metadata they produced, e.g. `shared` once LLIR
+    is generated. It can't be launched.
+    """
+
+    def __init__(self, src, metadata_group, metadata):
+        from collections import namedtuple
+        KernelMetadata = namedtuple('KernelMetadata', sorted(list(metadata.keys())))
+        self.metadata = KernelMetadata(**metadata)
+        self.name = metadata.get("name", src.name)
+        self.stage = metadata["stop_after"]
+        asm_files = [Path(p) for c, p in metadata_group.items() if not c.endswith(".json")]
+        self.asm = LazyAsm({artifact_stage(file.name): file for file in asm_files}, None)
+
+    def __repr__(self):
+        return f"PartialKernel({self.name}, stop_after={self.stage!r})"
+
+
+def _unload_binary(handles):
+    # `handles` is the `__dict__` of a `CompiledKernel`
+    if handles.get("module") is None:
+        return
+    unload_binary = getattr(driver.utils, "unload_binary", None)
+    if unload_binary is not None:
+        unload_binary(handles["module"], handles["device"])
+    handles["module"] = None
+    handles["function"] = None
+
+
 class CompiledKernel:
 
     # Hooks for external tools to monitor the execution of triton kernels
@@ -251,10 +722,14 @@ class CompiledKernel:
     launch_enter_hook = None
     launch_exit_hook = None
 
-    def __init__(self, src, metadata_group):
+    def __init__(self, src, metadata_group, metadata=None):
         from collections import namedtuple
-        metadata_path = next((Path(p) for c, p in metadata_group.items() if c.endswith(".json")))
-        self.metadata = json.loads(metadata_path.read_text())
+        # TODO: this shouldn't be here
+        from ..backends.nvidia.compiler import InfoFromBackendForTensorMap
+        if metadata is None:
+            metadata_path = next((Path(p) for c, p in metadata_group.items() if c.endswith(".json")))
+            metadata = json.loads(metadata_path.read_text())
+        self.metadata = metadata
         self.metadata['tensormaps_info'] = [InfoFromBackendForTensorMap(e) for e in self.metadata['tensormaps_info']
                                             ] if 'tensormaps_info' in self.metadata else []
         for i, _ in enumerate(self.metadata["tensormaps_info"]):
@@ -268,10 +743,7 @@ class CompiledKernel:
         self.run = driver.launcher_cls(src, self.metadata)
         # stores the text of each level of IR that was generated during compilation
         asm_files = [Path(p) for c, p in metadata_group.items() if not c.endswith(".json")]
-        self.asm = {
-            file.suffix[1:]: file.read_bytes() if file.suffix[1:] == driver.binary_ext else file.read_text()
-            for file in asm_files
-        }
+        self.asm = LazyAsm({artifact_stage(file.name): file for file in asm_files}, driver.binary_ext)
         self.kernel = self.asm[driver.binary_ext]
         # binaries are lazily initialized
         # because it involves doing runtime things
@@ -290,6 +762,20 @@ class CompiledKernel:
         # TODO: n_regs, n_spills should be metadata generated when calling `ptxas`
         self.module, self.function, self.n_regs, self.n_spills = driver.utils.load_binary(
             self.name, self.kernel, self.metadata.shared, device)
+        self.device = device
+
+    def _unload_handles(self):
+        """Unloads the binary from the device; it is loaded again on next use."""
+        _unload_binary(self.__dict__)
+
+    def _unload_when_unreachable(self):
+        """
+        Unloads the binary once the kernel is garbage collected. Unlike
+        `_unload_handles`, this is safe while other threads may be launching
+        the kernel (e.g. after it is evicted from a `KernelCache`).
+        """
+        # the finalizer must not reference the kernel itself, only its attributes
+        weakref.finalize(self, _unload_binary, self.__dict__)
 
     def __getattribute__(self, name):
         if name == 'run':
@@ -1,7 +1,8 @@
 """isort:skip_file"""
 # Import order is significant here.
 
-from . import math
+# `math` is only executed on first use (see `_lazy`)
+from ._lazy import math
 from . import extra
 from .standard import (
     argmax,
@@ -1,16 +1,62 @@
+import atexit
+import contextlib
 import json
 import os
 import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+import warnings
 from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
+import zlib
 import hashlib
 
+from filelock import FileLock, SoftFileLock, Timeout
+
 
 def default_cache_dir():
     return os.path.join(Path.home(), ".triton", "cache")
 
 
+def default_cache_max_size() -> Optional[int]:
+    return _parse_size(os.getenv("TRITON_CACHE_MAX_SIZE", ""))
+
+
+def default_lock_timeout() -> float:
+    return float(os.getenv("TRITON_CACHE_LOCK_TIMEOUT", "300"))
+
+
+def default_cache_artifacts() -> str:
+    """
+    Which outputs of a compilation are stored (`TRITON_CACHE_ARTIFACTS`): `all`
+    of them as is, `compressed` intermediate stages, or only the binary and the
+    metadata (`minimal`).
+    """
+    policy = os.getenv("TRITON_CACHE_ARTIFACTS", "").strip().lower() or "all"
+    if policy not in ("all", "compressed", "minimal"):
+        raise ValueError(f"TRITON_CACHE_ARTIFACTS must be all, compressed or minimal, not {policy!r}")
+    return policy
+
+
+def default_cache_dedup() -> bool:
+    return os.getenv("TRITON_CACHE_DEDUP", "1").strip().lower() not in ("0", "false", "off")
+
+
+def default_cache_read_only() -> bool:
+    return os.getenv("TRITON_CACHE_READ_ONLY", "0").strip().lower() in ("1", "true", "on")
+
+
+def default_scratch_dir():
+    return os.getenv("TRITON_CACHE_SCRATCH_DIR", "").strip() or os.path.join(tempfile.gettempdir(),
+                                                                             f"triton-scratch-{os.getuid()}")
+
+
 def default_override_dir():
     return os.path.join(Path.home(), ".triton", "override")
 
@@ -44,12 +90,91 @@ class CacheManager(ABC):
     def put_group(self, filename: str, group: Dict[str, str]):
         pass
 
+    def lock(self, timeout: Optional[float] = None):
+        """
+        Returns a context manager that holds an advisory lock on this entry,
+        shared with other processes, for up to `timeout` seconds of waiting.
+        Used to compile an entry once rather than once per process.
+        """
+        return contextlib.nullcontext()
+
+
+def _entry_path(cache_dir: str, key: str) -> str:
+    # Entries are sharded by the first two characters of their key so that no
+    # directory holds more than a fraction of them.
+    return os.path.join(cache_dir, key[:2], key)
+
+
+def _migrate_entry(cache_dir: str, key: str):
+    # entries written by versions that didn't shard the cache
+    flat_path = os.path.join(cache_dir, key)
+    if len(key) <= 2 or not os.path.isdir(flat_path):
+        return
+    try:
+        os.makedirs(os.path.join(cache_dir, key[:2]), exist_ok=True)
+        os.rename(flat_path, _entry_path(cache_dir, key))
+    except OSError:
+        # migrated concurrently, or the sharded entry already exists
+        pass
+
+
+def _blob_path(cache_dir: str, digest: str) -> str:
+    return os.path.join(cache_dir, _BLOBS_DIR, digest[:2], digest)
+
+
+def _link_blob(cache_dir: str, data: bytes, filepath: str) -> bool:
+    """
+    Stores `data` once per cache, in a blob named by its hash, and makes
+    `filepath` a hard link to it. Returns False if the file system doesn't
+    support it, in which case the caller writes `filepath` itself.
+    """
+    blob_path = _blob_path(cache_dir, hashlib.sha256(data).hexdigest())
+    suffix = f".tmp.pid_{os.getpid()}_{random.randint(0, 1000000)}"
+    temp_path = f"{filepath}{suffix}"
+    try:
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            with open(f"{blob_path}{suffix}", "wb") as f:
+                f.write(data)
+            os.replace(f"{blob_path}{suffix}", blob_path)
+        # the blob may be collected concurrently, in which case linking fails
+        os.link(blob_path, temp_path)
+        os.replace(temp_path, filepath)
+    except OSError:
+        for path in [f"{blob_path}{suffix}", temp_path]:
+            with contextlib.suppress(OSError):
+                os.remove(path)
+        return False
+    return True
+
+
+def _acquire_lock(lock_path: str, timeout: float):
+    lock = FileLock(lock_path, timeout=timeout)
+    try:
+        lock.acquire()
+        return lock
+    except NotImplementedError:
+        pass
+    # The file system doesn't support flock. A lock file is left behind by a
+    # process that dies while holding it, so it is broken once it is older
+    # than the timeout.
+    soft_lock_path = f"{lock_path}.soft"
+    try:
+        if time.time() - os.stat(soft_lock_path).st_mtime > timeout:
+            os.remove(soft_lock_path)
+    except FileNotFoundError:
+        pass
+    lock = SoftFileLock(soft_lock_path, timeout=timeout)
+    lock.acquire()
+    return lock
+
 
 class FileCacheManager(CacheManager):
 
-    def __init__(self, key, override=False, dump=False):
+    def __init__(self, key, override=False, dump=False, cache_dir=None):
         self.key = key
         self.lock_path = None
+        self.root_dir = None
         if dump:
             self.cache_dir = default_dump_dir()
             self.cache_dir = os.path.join(self.cache_dir, self.key)
@@ -60,10 +185,14 @@ class FileCacheManager(CacheManager):
             self.cache_dir = os.path.join(self.cache_dir, self.key)
         else:
             # create cache directory if it doesn't exist
-            self.cache_dir = os.getenv("TRITON_CACHE_DIR", "").strip() or default_cache_dir()
+            self.cache_dir = cache_dir or os.getenv("TRITON_CACHE_DIR", "").strip() or default_cache_dir()
             if self.cache_dir:
-                self.cache_dir = os.path.join(self.cache_dir, self.key)
+                # only the default cache is sharded, size-bounded and tracks usage
+                self.root_dir = self.cache_dir
+                self.cache_dir = _entry_path(self.root_dir, self.key)
                 self.lock_path = os.path.join(self.cache_dir, "lock")
+                if not os.path.isdir(self.cache_dir):
+                    _migrate_entry(self.root_dir, self.key)
                 os.makedirs(self.cache_dir, exist_ok=True)
             else:
                 raise RuntimeError("Could not create or locate cache dir")
@@ -76,8 +205,38 @@ class FileCacheManager(CacheManager):
             raise RuntimeError("Could not create or locate cache dir")
         return os.path.exists(self._make_path(filename))
 
+    @contextlib.contextmanager
+    def lock(self, timeout: Optional[float] = None):
+        if self.lock_path is None:
+            yield
+            return
+        timeout = default_lock_timeout() if timeout is None else timeout
+        os.makedirs(self.cache_dir, exist_ok=True)
+        try:
+            lock = _acquire_lock(self.lock_path, timeout)
+        except Timeout:
+            # the holder is stuck (or, on file systems without flock, died):
+            # writes are atomic, so going ahead only costs a redundant compilation
+            warnings.warn(f"Timed out after {timeout:g}s waiting for {self.lock_path}; proceeding without it")
+            yield
+            return
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def _touch(self):
+        # the modification time of an entry's directory is its last use
+        if self.root_dir is None:
+            return
+        try:
+            os.utime(self.cache_dir)
+        except OSError:
+            pass
+
     def get_file(self, filename) -> Optional[str]:
         if self.has_file(filename):
+            self._touch()
             return self._make_path(filename)
         else:
             return None
@@ -86,6 +245,7 @@ class FileCacheManager(CacheManager):
         grp_filename = f"__grp__{filename}"
         if not self.has_file(grp_filename):
             return None
+        self._touch()
         grp_filepath = self._make_path(grp_filename)
         with open(grp_filepath) as f:
             grp_data = json.load(f)
@@ -95,6 +255,9 @@ class FileCacheManager(CacheManager):
             return None
         result = {}
         for c, p in child_paths.items():
+            if not os.path.exists(p) and os.path.basename(os.path.dirname(p)) == self.key:
+                # written before the entry was moved (e.g. into its shard)
+                p = self._make_path(os.path.basename(p))
             if os.path.exists(p):
                 result[c] = p
         return result
@@ -122,19 +285,109 @@ class FileCacheManager(CacheManager):
         # use tempfile to be robust against program interruptions
         temp_path = f"{filepath}.tmp.pid_{pid}_{rnd_id}"
         mode = "wb" if binary else "w"
-        with open(temp_path, mode) as f:
-            f.write(data)
-        # Replace is guaranteed to be atomic on POSIX systems if it succeeds
-        # so filepath cannot see a partial write
-        os.replace(temp_path, filepath)
+        # the entry may have been evicted since this manager was created
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # identical outputs of different keys (e.g. the same binary compiled
+        # with different unrelated options) are stored once
+        dedup = (self.root_dir is not None and len(data) >= _BLOB_MIN_SIZE and not filename.startswith("__grp__")
+                 and default_cache_dedup())
+        if not dedup or not _link_blob(self.root_dir, data if binary else data.encode("utf-8"), filepath):
+            with open(temp_path, mode) as f:
+                f.write(data)
+            # Replace is guaranteed to be atomic on POSIX systems if it succeeds
+            # so filepath cannot see a partial write
+            os.replace(temp_path, filepath)
+        if self.root_dir is not None:
+            _maybe_evict(self.root_dir, len(data))
         return filepath
 
 
+class ReadOnlyCacheManager(CacheManager):
+    """
+    Serves a pre-populated cache that is never written to (e.g. mounted
+    read-only), selected with `TRITON_CACHE_READ_ONLY=1`. Entries are not
+    created, locked, touched or counted in its directory, and since they can't
+    change, a hit on a group is a single read of the group file. Whatever is
+    compiled goes to a writable scratch `FileCacheManager` in
+    `TRITON_CACHE_SCRATCH_DIR` (a temporary directory by default), which is
+    only created on a miss. Caches written by versions that didn't shard them
+    must be migrated (`python -m triton.runtime.cache migrate`) beforehand.
+    """
+
+    def __init__(self, key, override=False, dump=False):
+        if override or dump:
+            raise RuntimeError("ReadOnlyCacheManager only serves the kernel cache")
+        self.key = key
+        self.cache_dir = _entry_path(os.getenv("TRITON_CACHE_DIR", "").strip() or default_cache_dir(), key)
+        self._scratch = None
+
+    @property
+    def scratch(self) -> FileCacheManager:
+        if self._scratch is None:
+            self._scratch = FileCacheManager(self.key, cache_dir=default_scratch_dir())
+        return self._scratch
+
+    def _make_path(self, filename) -> str:
+        return os.path.join(self.cache_dir, filename)
+
+    def has_file(self, filename) -> bool:
+        return os.path.exists(self._make_path(filename)) or self.scratch.has_file(filename)
+
+    def get_file(self, filename) -> Optional[str]:
+        path = self._make_path(filename)
+        if os.path.exists(path):
+            return path
+        return self.scratch.get_file(filename)
+
+    def get_group(self, filename: str) -> Optional[Dict[str, str]]:
+        try:
+            with open(self._make_path(f"__grp__{filename}")) as f:
+                child_paths = json.load(f).get("child_paths", None)
+        except FileNotFoundError:
+            return self.scratch.get_group(filename)
+        # Invalid group data.
+        if child_paths is None:
+            return None
+        # the cache may have been written elsewhere (and mounted here), so the
+        # files of this entry are found by name
+        return {
+            c: self._make_path(os.path.basename(p)) if os.path.basename(os.path.dirname(p)) == self.key else p
+            for c, p in child_paths.items()
+        }
+
+    def put(self, data, filename, binary=True) -> str:
+        return self.scratch.put(data, filename, binary=binary)
+
+    def put_group(self, filename: str, group: Dict[str, str]):
+        return self.scratch.put_group(filename, group)
+
+    def lock(self, timeout: Optional[float] = None):
+        return self.scratch.lock(timeout)
+
+
 __cache_cls = FileCacheManager
 __cache_cls_nme = "DEFAULT"
 
+# keys passed to `get_cache_manager` while recording (see `triton.runtime.cache_bundle`)
+_recorded_keys: Optional[set] = None
+
+
+def _write_recorded_keys(path):
+    with open(path, "a") as f:
+        f.writelines(f"{key}\n" for key in sorted(_recorded_keys))
 
-def get_cache_manager(key) -> CacheManager:
+
+if os.getenv("TRITON_CACHE_RECORD_KEYS", "").strip():
+    _recorded_keys = set()
+    atexit.register(_write_recorded_keys, os.environ["TRITON_CACHE_RECORD_KEYS"].strip())
+
+
+def get_cache_manager(key, record: bool = True) -> CacheManager:
+    """
+    Returns the cache manager of `key`. With `record=False`, the key is not
+    recorded by `TRITON_CACHE_RECORD_KEYS`, e.g. for entries that are only an
+    optimization of the compiler and not worth shipping in a bundle.
+    """
     import os
 
     user_cache_manager = os.environ.get("TRITON_CACHE_MANAGER", None)
@@ -149,6 +402,10 @@ def get_cache_manager(key) -> CacheManager:
         __cache_cls = getattr(module, clz_nme)
         __cache_cls_nme = user_cache_manager
 
+    if record and _recorded_keys is not None:
+        _recorded_keys.add(key)
+    if __cache_cls is FileCacheManager and default_cache_read_only():
+        return ReadOnlyCacheManager(key)
     return __cache_cls(key)
 
 
@@ -168,3 +425,453 @@ def make_so_cache_key(version_hash, signature, constants, ids, **kwargs):
         key = f"{key}-{kwargs.get(kw)}"
     key = hashlib.md5(key.encode("utf-8")).hexdigest()
     return key
+
+
+# -----------------------------------------------------------------------------
+# Compressed artifacts
+# -----------------------------------------------------------------------------
+
+# suffixes of compressed files; the codec of a file is known from its name alone
+_ZLIB_SUFFIX = ".zz"
+_ZSTD_SUFFIX = ".zst"
+
+
+def compress_artifact(data) -> Tuple[bytes, str]:
+    """
+    Compresses the output of a compilation stage with zstd if the `zstandard`
+    module is available, zlib otherwise. Returns the compressed data and the
+    suffix to append to the file name.
+    """
+    if not isinstance(data, bytes):
+        data = str(data).encode("utf-8")
+    try:
+        import zstandard
+    except ImportError:
+        return zlib.compress(data, 6), _ZLIB_SUFFIX
+    return zstandard.ZstdCompressor(level=3).compress(data), _ZSTD_SUFFIX
+
+
+def read_artifact(path) -> bytes:
+    """Reads a file written by the cache, decompressing it if it was compressed."""
+    data = Path(path).read_bytes()
+    if str(path).endswith(_ZLIB_SUFFIX):
+        return zlib.decompress(data)
+    if str(path).endswith(_ZSTD_SUFFIX):
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+
+def artifact_stage(filename: str) -> str:
+    """Returns the stage (e.g. `ptx`) of a file written by the compiler, compressed or not."""
+    for suffix in (_ZLIB_SUFFIX, _ZSTD_SUFFIX):
+        if filename.endswith(suffix):
+            filename = filename[:-len(suffix)]
+    return os.path.splitext(filename)[1][1:]
+
+
+def record_lookup(hit: bool):
+    """
+    Adds a lookup of a compiled kernel (by `triton.compile`) to the hits or
+    misses of the file cache. Other reads and writes through cache managers,
+    e.g. of launchers or imported bundles, are not counted.
+    """
+    cache_dir = os.getenv("TRITON_CACHE_DIR", "").strip() or default_cache_dir()
+    _record(cache_dir, "hits" if hit else "misses")
+
+
+def record_artifacts(produced: int, stored: int, seconds: float, stage_cache_stored: int = 0):
+    """
+    Adds the bytes of intermediate stages produced by a compilation, the bytes
+    of them stored in the cache under the current `TRITON_CACHE_ARTIFACTS`
+    policy, the time it took and the bytes written to the stage cache
+    (`TRITON_STAGE_CACHE`) to the stats of the file cache.
+    """
+    cache_dir = os.getenv("TRITON_CACHE_DIR", "").strip() or default_cache_dir()
+    _record(cache_dir, "ir_bytes_produced", produced)
+    _record(cache_dir, "ir_bytes_stored", stored)
+    _record(cache_dir, "ir_store_us", int(seconds * 1e6))
+    _record(cache_dir, "stage_cache_bytes_stored", stage_cache_stored)
+
+
+# -----------------------------------------------------------------------------
+# Size limit and maintenance of the default (file) cache
+# -----------------------------------------------------------------------------
+
+# Entries used less than this many seconds ago are never removed, so that a
+# process that just looked up an entry (or is still writing it) can read it.
+EVICTION_GRACE_PERIOD = 60.0
+# How often a process re-measures the cache instead of trusting its own count
+# of the bytes it wrote.
+_RESCAN_INTERVAL = 60.0
+_GC_LOCK = "__gc__.lock"
+# content-addressed files, hard linked into the entries that contain them
+_BLOBS_DIR = "__blobs__"
+# smaller files (e.g. metadata, which includes the key) are not worth deduplicating
+_BLOB_MIN_SIZE = 4096
+_STATS_FILE = "__stats__.json"
+_SIZE_UNITS = {"": 1, "k": 2**10, "m": 2**20, "g": 2**30, "t": 2**40}
+_AGE_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def _parse_size(text: str) -> Optional[int]:
+    """Parses sizes like `500000`, `512M` or `10G`; returns None for an empty string."""
+    text = text.strip()
+    if not text:
+        return None
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?", text.lower())
+    if match is None:
+        raise ValueError(f"invalid cache size: {text!r}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+
+def _parse_age(text: str) -> float:
+    """Parses ages like `3600`, `12h` or `7d` into seconds."""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([smhdw]?)", text.strip().lower())
+    if match is None:
+        raise ValueError(f"invalid age: {text!r}")
+    return float(match.group(1)) * _AGE_UNITS[match.group(2)]
+
+
+def _format_size(size: int) -> str:
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if size < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    path: str
+    # file name -> size in bytes (for deduplicated files, a share of the size of their blob)
+    files: Dict[str, int]
+    last_used: float
+
+    @property
+    def size(self) -> int:
+        return sum(self.files.values())
+
+
+def _apportioned_size(st: os.stat_result) -> int:
+    # A file linked to a blob shares its bytes with the other entries linked to
+    # it (one link is the blob's own), so that the sizes of the entries add up
+    # to the size of the cache.
+    return st.st_size // (st.st_nlink - 1) if st.st_nlink > 1 else st.st_size
+
+
+def _is_entry_name(name: str) -> bool:
+    return not name.startswith("__") and ".evict." not in name
+
+
+def _scan_entry_dirs(cache_dir: str):
+    """Yields everything at the level of the entries: in the shards and, for unsharded caches, at the top level."""
+    try:
+        dirs = list(os.scandir(cache_dir))
+    except FileNotFoundError:
+        return
+    for d in dirs:
+        if len(d.name) == 2 and d.is_dir(follow_symlinks=False):
+            try:
+                yield from os.scandir(d.path)
+            except FileNotFoundError:
+                continue
+        else:
+            yield d
+
+
+def cache_entries(cache_dir: Optional[str] = None) -> List[CacheEntry]:
+    """Lists the entries (one per cache key) of the file cache in `cache_dir`."""
+    cache_dir = cache_dir or os.getenv("TRITON_CACHE_DIR", "").strip() or default_cache_dir()
+    entries = []
+    for d in _scan_entry_dirs(cache_dir):
+        if not _is_entry_name(d.name) or not d.is_dir(follow_symlinks=False):
+            continue
+        try:
+            last_used = d.stat(follow_symlinks=False).st_mtime
+            files = {
+                f.name: _apportioned_size(f.stat(follow_symlinks=False))
+                for f in os.scandir(d.path)
+                if f.is_file()
+            }
+        except FileNotFoundError:
+            # removed concurrently
+            continue
+        entries.append(CacheEntry(d.name, d.path, files, last_used))
+    return entries
+
+
+def _remove_entry(entry: CacheEntry, grace_period: float) -> bool:
+    # the entry may have been used since it was listed
+    try:
+        if time.time() - os.stat(entry.path).st_mtime < grace_period:
+            return False
+    except FileNotFoundError:
+        return False
+    # move the entry out of the way atomically so that no process sees it half-deleted
+    trash = f"{entry.path}.evict.pid_{os.getpid()}_{random.randint(0, 1000000)}"
+    try:
+        os.rename(entry.path, trash)
+    except OSError:
+        return False
+    shutil.rmtree(trash, ignore_errors=True)
+    return True
+
+
+def _collect_blobs(cache_dir: str, grace_period: float) -> int:
+    """Removes the blobs no entry links to anymore; returns the number of bytes freed."""
+    freed = 0
+    deadline = time.time() - grace_period
+    try:
+        shards = list(os.scandir(os.path.join(cache_dir, _BLOBS_DIR)))
+    except FileNotFoundError:
+        return 0
+    for shard in shards:
+        try:
+            for f in os.scandir(shard.path):
+                st = f.stat(follow_symlinks=False)
+                # recent blobs may be about to be linked, or be leftovers of a write still in progress
+                if (st.st_nlink == 1 or ".tmp.pid_" in f.name) and st.st_mtime < deadline:
+                    os.remove(f.path)
+                    freed += st.st_size
+        except FileNotFoundError:
+            continue
+    return freed
+
+
+def _gc_lock(cache_dir: str, blocking: bool) -> FileLock:
+    os.makedirs(cache_dir, exist_ok=True)
+    return FileLock(os.path.join(cache_dir, _GC_LOCK), timeout=-1 if blocking else 0)
+
+
+def evict(cache_dir: Optional[str] = None, max_size: Optional[int] = None, grace_period: float = EVICTION_GRACE_PERIOD,
+          blocking: bool = True) -> Optional[int]:
+    """
+    Removes the least recently used entries of the file cache until it holds
+    at most `max_size` bytes (`TRITON_CACHE_MAX_SIZE` by default). Returns the
+    size of the cache afterwards, or None if `blocking` is False and another
+    process is already collecting the cache.
+    """
+    cache_dir = cache_dir or os.getenv("TRITON_CACHE_DIR", "").strip() or default_cache_dir()
+    max_size = default_cache_max_size() if max_size is None else max_size
+    try:
+        with _gc_lock(cache_dir, blocking):
+            entries = cache_entries(cache_dir)
+            total = sum(entry.size for entry in entries)
+            if max_size is None:
+                return total
+            removed = False
+            for entry in sorted(entries, key=lambda entry: entry.last_used):
+                if total <= max_size:
+                    break
+                if _remove_entry(entry, grace_period):
+                    total -= entry.size
+                    removed = True
+            if removed:
+                _collect_blobs(cache_dir, grace_period)
+            return total
+    except Timeout:
+        return None
+
+
+def prune(cache_dir: Optional[str] = None, older_than: float = 7 * 86400) -> List[CacheEntry]:
+    """Removes the entries of the file cache that were not used in the last `older_than` seconds."""
+    cache_dir = cache_dir or os.getenv("TRITON_CACHE_DIR", "").strip() or default_cache_dir()
+    removed = []
+    with _gc_lock(cache_dir, blocking=True):
+        for entry in cache_entries(cache_dir):
+            if time.time() - entry.last_used > older_than and _remove_entry(entry, older_than):
+                removed.append(entry)
+        if removed:
+            _collect_blobs(cache_dir, EVICTION_GRACE_PERIOD)
+    return removed
+
+
+def clean(cache_dir: Optional[str] = None, grace_period: float = EVICTION_GRACE_PERIOD) -> int:
+    """
+    Removes what interrupted processes left behind: temporary files of unfinished
+    writes, empty entries and half-deleted entries, as well as blobs that are no
+    longer part of any entry. Returns the number of bytes freed.
+    """
+    cache_dir = cache_dir or os.getenv("TRITON_CACHE_DIR", "").strip() or default_cache_dir()
+    freed = 0
+    deadline = time.time() - grace_period
+    with _gc_lock(cache_dir, blocking=True):
+        for d in _scan_entry_dirs(cache_dir):
+            try:
+                if ".evict." in d.name and d.stat(follow_symlinks=False).st_mtime < deadline:
+                    freed += sum(f.stat().st_size for f in os.scandir(d.path) if f.is_file())
+                    shutil.rmtree(d.path, ignore_errors=True)
+                elif _is_entry_name(d.name) and d.is_dir(follow_symlinks=False):
+                    for f in os.scandir(d.path):
+                        if ".tmp.pid_" in f.name and f.stat().st_mtime < deadline:
+                            freed += f.stat().st_size
+                            os.remove(f.path)
+                    if not any(os.scandir(d.path)) and d.stat(follow_symlinks=False).st_mtime < deadline:
+                        os.rmdir(d.path)
+            except FileNotFoundError:
+                continue
+        freed += _collect_blobs(cache_dir, grace_period)
+    return freed
+
+
+def migrate(cache_dir: Optional[str] = None) -> int:
+    """
+    Moves the entries of an unsharded cache into their shards; returns how many
+    were moved. Entries are otherwise moved one by one as they are used.
+    """
+    cache_dir = cache_dir or os.getenv("TRITON_CACHE_DIR", "").strip() or default_cache_dir()
+    moved = 0
+    for d in list(os.scandir(cache_dir)):
+        if len(d.name) > 2 and _is_entry_name(d.name) and d.is_dir(follow_symlinks=False):
+            _migrate_entry(cache_dir, d.name)
+            moved += not os.path.exists(d.path)
+    return moved
+
+
+# bytes in the cache according to the last scan and what this process wrote since, and the time of the scan
+_usage: Dict[str, List[float]] = dict()
+_usage_lock = threading.Lock()
+
+
+def _maybe_evict(cache_dir: str, nbytes: int):
+    max_size = default_cache_max_size()
+    if max_size is None:
+        return
+    now = time.time()
+    with _usage_lock:
+        usage = _usage.get(cache_dir)
+        if usage is not None:
+            usage[0] += nbytes
+            stale = now - usage[1] > _RESCAN_INTERVAL
+            # don't re-measure on every write when nothing can be evicted yet
+            if not stale and (usage[0] <= max_size or now - usage[1] < 1.0):
+                return
+    total = evict(cache_dir, max_size, blocking=False)
+    with _usage_lock:
+        _usage[cache_dir] = [max_size if total is None else total, now]
+
+
+# hits and misses of this process that are not yet added to the stats file of each cache
+_stats: Dict[str, Counter] = dict()
+_stats_lock = threading.Lock()
+
+
+def _record(cache_dir: str, event: str, count: int = 1):
+    with _stats_lock:
+        if not _stats:
+            atexit.register(_flush_stats)
+        _stats.setdefault(cache_dir, Counter())[event] += count
+
+
+def _flush_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+        _stats.clear()
+    for cache_dir, counts in stats.items():
+        path = os.path.join(cache_dir, _STATS_FILE)
+        try:
+            with FileLock(f"{path}.lock", timeout=10):
+                totals = Counter(json.loads(Path(path).read_text())) if os.path.exists(path) else Counter()
+                totals.update(counts)
+                tmp_path = f"{path}.tmp.pid_{os.getpid()}_{random.randint(0, 1000000)}"
+                Path(tmp_path).write_text(json.dumps(totals))
+                os.replace(tmp_path, path)
+        except (OSError, ValueError, Timeout):
+            pass
+
+
+def cache_stats(cache_dir: Optional[str] = None) -> dict:
+    """
+    Returns the number of entries, their size per stage (i.e. per file
+    extension), the kernel lookups by `triton.compile` that hit or missed in
+    the processes that used the file cache in `cache_dir` and how much of the
+    intermediate stages they produced was stored (see
+    `TRITON_CACHE_ARTIFACTS`) or written to the stage cache.
+    """
+    cache_dir = cache_dir or os.getenv("TRITON_CACHE_DIR", "").strip() or default_cache_dir()
+    _flush_stats()
+    entries = cache_entries(cache_dir)
+    stages = Counter()
+    for entry in entries:
+        for name, size in entry.files.items():
+            stage = "group" if name.startswith("__grp__") else artifact_stage(name) or "other"
+            stages[stage] += size
+    path = os.path.join(cache_dir, _STATS_FILE)
+    try:
+        counts = json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        counts = dict()
+    hits, misses = counts.get("hits", 0), counts.get("misses", 0)
+    return {
+        "cache_dir": cache_dir,
+        "entries": len(entries),
+        "bytes": sum(stages.values()),
+        "max_size": default_cache_max_size(),
+        "stages": dict(stages.most_common()),
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / (hits + misses) if hits + misses else None,
+        "artifacts": default_cache_artifacts(),
+        "ir_bytes_produced": counts.get("ir_bytes_produced", 0),
+        "ir_bytes_stored": counts.get("ir_bytes_stored", 0),
+        "ir_store_seconds": counts.get("ir_store_us", 0) / 1e6,
+        "stage_cache_bytes_stored": counts.get("stage_cache_bytes_stored", 0),
+    }
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m triton.runtime.cache",
+                                     description="Inspect and clean up the Triton kernel cache.")
+    parser.add_argument("--cache-dir", default=None,
+                        help="cache directory (default: $TRITON_CACHE_DIR or ~/.triton/cache)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    stats_parser = commands.add_parser("stats", help="report entries, bytes per stage and hit rate")
+    stats_parser.add_argument("--json", action="store_true", help="print the stats as JSON")
+    gc_parser = commands.add_parser("gc", help="remove leftovers of interrupted processes and evict least recently "
+                                    "used entries down to the size limit")
+    gc_parser.add_argument("--max-size", type=_parse_size, default=None,
+                           help="size limit, e.g. 10G (default: $TRITON_CACHE_MAX_SIZE)")
+    prune_parser = commands.add_parser("prune", help="remove entries that were not used recently")
+    prune_parser.add_argument("--older-than", type=_parse_age, required=True, help="age, e.g. 12h or 7d")
+    commands.add_parser("migrate", help="move the entries of a cache written by older versions into shards")
+    args = parser.parse_args(argv)
+
+    if args.command == "stats":
+        stats = cache_stats(args.cache_dir)
+        if args.json:
+            print(json.dumps(stats, indent=2))
+            return
+        max_size = stats["max_size"]
+        print(f"cache dir: {stats['cache_dir']}")
+        print(f"entries:   {stats['entries']}")
+        print(f"size:      {_format_size(stats['bytes'])}" +
+              (f" (limit {_format_size(max_size)})" if max_size is not None else ""))
+        for stage, size in stats["stages"].items():
+            print(f"  {stage:<10} {_format_size(size):>12}")
+        hit_rate = stats["hit_rate"]
+        print(f"hits:      {stats['hits']}, misses: {stats['misses']}" +
+              (f" ({hit_rate:.1%} hit rate)" if hit_rate is not None else ""))
+        produced, stored = stats["ir_bytes_produced"], stats["ir_bytes_stored"]
+        if produced:
+            print(f"IR stages: {_format_size(stored)} stored of {_format_size(produced)} produced "
+                  f"({1 - stored / produced:.1%} saved, {stats['ir_store_seconds']:.2f} s spent storing; "
+                  f"TRITON_CACHE_ARTIFACTS={stats['artifacts']})")
+        if stats["stage_cache_bytes_stored"]:
+            print(f"stage cache: {_format_size(stats['stage_cache_bytes_stored'])} stored on top of the IR stages "
+                  "(TRITON_STAGE_CACHE=0 to disable)")
+    elif args.command == "gc":
+        freed = clean(args.cache_dir)
+        total = evict(args.cache_dir, args.max_size)
+        print(f"removed {_format_size(freed)} of leftovers; cache size is now {_format_size(total)}")
+    elif args.command == "prune":
+        removed = prune(args.cache_dir, args.older_than)
+        print(f"removed {len(removed)} entries ({_format_size(sum(entry.size for entry in removed))})")
+    elif args.command == "migrate":
+        print(f"moved {migrate(args.cache_dir)} entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Bundles of kernel cache entries, to ship kernels compiled ahead of time (e.g.
+in CI) to machines that would otherwise compile them on first use.
+
+Record the cache keys a workload uses, export the corresponding entries of the
+cache into a bundle, then import the bundle into the cache of another machine:
+
+    TRITON_CACHE_RECORD_KEYS=keys.txt python workload.py
+    python -m triton.runtime.cache_bundle export --keys keys.txt kernels.tar.gz
+    python -m triton.runtime.cache_bundle import kernels.tar.gz
+
+or, from Python, `with record_keys() as keys: ...`, `export_bundle(path, keys)`
+and `import_bundle(path)`.
+
+A bundle is a tar archive with a `manifest.json` and one directory per entry.
+Kernels are only imported if they were compiled by the same Triton (i.e. with
+the same `triton_key()`) and the same backend (e.g. `ptxas` version), and
+launchers only if they were built for the same Python ABI.
+"""
+import contextlib
+import io
+import json
+import os
+import re
+import sysconfig
+import tarfile
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import cache
+
+BUNDLE_FORMAT = 1
+# cache keys are hex digests
+_KEY_RE = re.compile(r"[0-9a-f]{32,64}")
+
+
+@contextlib.contextmanager
+def record_keys():
+    """Collects the keys of the cache entries used in the block."""
+    previous = cache._recorded_keys
+    keys = cache._recorded_keys = set() if previous is None else previous
+    try:
+        yield keys
+    finally:
+        cache._recorded_keys = previous
+
+
+def _entry_dir(cache_dir, key) -> Optional[str]:
+    for path in [cache._entry_path(cache_dir, key), os.path.join(cache_dir, key)]:
+        if os.path.isdir(path):
+            return path
+    return None
+
+
+def _entry_files(path) -> Dict[str, str]:
+    return {
+        name: os.path.join(path, name)
+        for name in sorted(os.listdir(path))
+        if name != "lock" and ".tmp.pid_" not in name and os.path.isfile(os.path.join(path, name))
+    }
+
+
+def _describe(key, files) -> Optional[dict]:
+    """Returns the manifest entry of a kernel or launcher, None for other cache entries."""
+    groups = [name for name in files if name.startswith("__grp__")]
+    if groups:
+        metadata_name = groups[0][len("__grp__"):]
+        with open(files[metadata_name]) as f:
+            metadata = json.load(f)
+        if "target" not in metadata:
+            # e.g. an intermediate stage cached by the compiler
+            return None
+        target = tuple(metadata["target"])
+        return {"key": key, "kind": "kernel", "files": list(files), "target": target,
+                "backend_hash": _backend_hash(target)}
+    if any(name.endswith(".so") for name in files):
+        return {"key": key, "kind": "launcher", "files": list(files),
+                "ext_suffix": sysconfig.get_config_var("EXT_SUFFIX")}
+    return None
+
+
+_backend_hashes = dict()
+
+
+def _backend_hash(target) -> Optional[str]:
+    from ..compiler.compiler import make_backend
+    if target not in _backend_hashes:
+        try:
+            _backend_hashes[target] = make_backend(target).hash()
+        except RuntimeError:
+            # e.g. no backend for this target on this machine
+            _backend_hashes[target] = None
+    return _backend_hashes[target]
+
+
+def export_bundle(path, keys: Iterable[str], cache_dir: Optional[str] = None) -> List[str]:
+    """
+    Writes the kernels and launchers among the cache entries `keys` to the
+    bundle `path` (compressed if it ends with `.gz`). Returns the exported keys.
+    """
+    from ..compiler.compiler import triton_key
+    from .. import __version__
+    cache_dir = cache_dir or os.getenv("TRITON_CACHE_DIR", "").strip() or cache.default_cache_dir()
+    entries = []
+    with tarfile.open(path, "w:gz" if str(path).endswith(".gz") else "w") as tar:
+        for key in sorted(set(keys)):
+            entry_dir = _entry_dir(cache_dir, key)
+            if entry_dir is None:
+                continue
+            files = _entry_files(entry_dir)
+            entry = _describe(key, files)
+            if entry is None:
+                continue
+            for name, file_path in files.items():
+                tar.add(file_path, arcname=f"entries/{key}/{name}")
+            entries.append(entry)
+        manifest = {
+            "format": BUNDLE_FORMAT,
+            "triton_version": __version__,
+            "triton_key": triton_key(),
+            "entries": entries,
+        }
+        data = json.dumps(manifest, indent=2).encode("utf-8")
+        info = tarfile.TarInfo("manifest.json")
+        info.size = len(data)
+        tar.addfile(info, io.BytesIO(data))
+    return [entry["key"] for entry in entries]
+
+
+def _skip_reason(entry, manifest) -> Optional[str]:
+    from ..compiler.compiler import triton_key
+    if entry["kind"] == "kernel":
+        if manifest["triton_key"] != triton_key():
+            return "compiled by a different version of Triton"
+        if entry["backend_hash"] != _backend_hash(tuple(entry["target"])):
+            return f"compiled by a different backend for {tuple(entry['target'])}"
+    elif entry["kind"] == "launcher":
+        if entry["ext_suffix"] != sysconfig.get_config_var("EXT_SUFFIX"):
+            return f"built for a different Python ({entry['ext_suffix']})"
+    else:
+        return f"unknown kind of entry {entry['kind']!r}"
+    return None
+
+
+def _check_entry(entry, path):
+    """Rejects entries that would write outside of their cache entry."""
+    key = entry.get("key")
+    if not isinstance(key, str) or not _KEY_RE.fullmatch(key):
+        raise RuntimeError(f"{path} has an entry with an invalid key {key!r}")
+    files = entry.get("files")
+    if not isinstance(files, list):
+        raise RuntimeError(f"{path} has an entry {key} without a list of files")
+    for name in files:
+        if not isinstance(name, str) or name in ("", ".", "..") or os.path.basename(name) != name:
+            raise RuntimeError(f"{path} has an entry {key} with an invalid file name {name!r}")
+
+
+def import_bundle(path) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Adds the entries of the bundle `path` to the cache (through
+    `get_cache_manager`). Returns the imported keys and the reason each of the
+    other keys was skipped. Raises `RuntimeError`, before writing anything, if
+    an entry's key isn't a hex digest or a file name isn't a plain basename.
+    """
+    imported, skipped = [], dict()
+    with tarfile.open(path, "r:*") as tar:
+        manifest = json.load(tar.extractfile("manifest.json"))
+        if manifest.get("format") != BUNDLE_FORMAT:
+            raise RuntimeError(f"{path} is a bundle of format {manifest.get('format')}, expected {BUNDLE_FORMAT}")
+        # nothing is written unless the whole manifest is sound
+        for entry in manifest["entries"]:
+            _check_entry(entry, path)
+        for entry in manifest["entries"]:
+            key = entry["key"]
+            reason = _skip_reason(entry, manifest)
+            if reason is not None:
+                skipped[key] = reason
+                continue
+            manager = cache.get_cache_manager(key)
+            paths = dict()
+            groups = []
+            for name in entry["files"]:
+                data = tar.extractfile(f"entries/{key}/{name}").read()
+                if name.startswith("__grp__"):
+                    groups.append((name[len("__grp__"):], json.loads(data)))
+                else:
+                    paths[name] = manager.put(data, name, binary=True)
+            # groups refer to files by their path on the machine that exported them
+            for name, group in groups:
+                manager.put_group(name, {c: paths[c] for c in group.get("child_paths", dict()) if c in paths})
+            imported.append(key)
+    return imported, skipped
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m triton.runtime.cache_bundle")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="export cache entries to a bundle")
+    export_parser.add_argument("bundle")
+    export_parser.add_argument("--keys", required=True,
+                               help="file with one cache key per line, e.g. written via TRITON_CACHE_RECORD_KEYS")
+    export_parser.add_argument("--cache-dir", default=None)
+    import_parser = commands.add_parser("import", help="import a bundle into the cache")
+    import_parser.add_argument("bundle")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        with open(args.keys) as f:
+            keys = [line.strip() for line in f if line.strip()]
+        exported = export_bundle(args.bundle, keys, args.cache_dir)
+        print(f"exported {len(exported)} entries to {args.bundle}")
+    elif args.command == "import":
+        imported, skipped = import_bundle(args.bundle)
+        for key, reason in skipped.items():
+            print(f"skipped {key}: {reason}")
+        print(f"imported {len(imported)} entries, skipped {len(skipped)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,15 @@
+import os
+
 from ..backends import backends
 
 
 def _create_driver():
+    # e.g. TRITON_DRIVER=null to launch kernels without a device
+    name = os.environ.get("TRITON_DRIVER")
+    if name:
+        if name not in backends:
+            raise RuntimeError(f"TRITON_DRIVER={name} does not name a backend (available: {', '.join(backends)})")
+        return backends[name].driver()
     actives = [x.driver for x in backends.values() if x.driver.is_active()]
     if len(actives) != 1:
         raise RuntimeError(f"{len(actives)} active drivers ({actives}). There should only be one.")
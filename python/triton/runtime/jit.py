@@ -2,12 +2,19 @@ from __future__ import annotations, division
 import ast
 import hashlib
 import inspect
+import itertools
+import json
 import os
 import textwrap
+import threading
+import weakref
 from collections import defaultdict, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import cached_property
-from typing import Callable, Generic, Iterable, List, Optional, TypeVar, Union, cast, overload
+from typing import Callable, Dict, Generic, Iterable, List, Optional, TypeVar, Union, cast, overload
 from ..runtime.driver import driver
+from .recompile import RecompileTracker
+from .singleflight import SingleFlight
 
 TRITON_MODULE = __name__[:-len(".runtime.jit")]
 
@@ -23,12 +30,18 @@ class DependenciesFinder(ast.NodeVisitor):
     This AST visitor is used to find dependencies of a JITFunction. This can
     be used to invalidate a JITFunction's hash when its source code -- or
     that of its dependencies -- changes.
+
+    `call_paths` records, in visiting order, the dotted names of the called
+    functions (e.g. `("module", "fn")`), which is all `_hash_call_paths` needs
+    to recompute `ret` without parsing the source. It is `None` if a callee
+    is not a plain (dotted) name.
     """
 
     def __init__(self, globals, src) -> None:
         super().__init__()
         self.ret = hashlib.sha1(src.encode("utf-8")).hexdigest()
         self.globals = globals
+        self.call_paths = []
 
     def visit_Name(self, node):
         return self.globals.get(node.id, None)
@@ -42,26 +55,257 @@ class DependenciesFinder(ast.NodeVisitor):
         return getattr(lhs, node.attr)
 
     def visit_Call(self, node):
-        func = self.visit(node.func)
-        if func is None:
-            return
-        if inspect.isbuiltin(func):
-            return
-        if func.__module__ and (func.__module__.startswith(TRITON_MODULE)):
-            return
-        assert isinstance(
-            func, JITFunction
-        ), f'Function "{func.__name__}" is being called from a Triton function but is not a Triton function itself. Decorate it with @triton.jit to fix this'
-        func_cache_key = func.cache_key
-        noinline = str(getattr(func, "noinline", False))
-        self.ret = (self.ret + func_cache_key + noinline).encode("utf-8")
-        self.ret = hashlib.sha1(self.ret).hexdigest()
+        if self.call_paths is not None:
+            path = _call_path(node.func)
+            if path is None:
+                self.call_paths = None
+            else:
+                self.call_paths.append(path)
+        self.ret = _hash_dependency(self.ret, self.visit(node.func))
+
+
+def _call_path(node):
+    if isinstance(node, ast.Name):
+        return [node.id]
+    if isinstance(node, ast.Attribute):
+        path = _call_path(node.value)
+        return None if path is None else path + [node.attr]
+    return None
+
+
+def _resolve_call_path(globals, path):
+    # same lookup as `DependenciesFinder.visit` on the corresponding node
+    func = globals.get(path[0], None)
+    for attr in path[1:]:
+        if func is None or (getattr(func, "__name__", "") == TRITON_MODULE):
+            func = None
+        else:
+            func = getattr(func, attr)
+    return func
+
+
+def _hash_dependency(ret, func):
+    if func is None:
+        return ret
+    if inspect.isbuiltin(func):
+        return ret
+    if func.__module__ and (func.__module__.startswith(TRITON_MODULE)):
+        return ret
+    assert isinstance(
+        func, JITFunction
+    ), f'Function "{func.__name__}" is being called from a Triton function but is not a Triton function itself. Decorate it with @triton.jit to fix this'
+    func_cache_key = func.cache_key
+    noinline = str(getattr(func, "noinline", False))
+    ret = (ret + func_cache_key + noinline).encode("utf-8")
+    return hashlib.sha1(ret).hexdigest()
+
+
+def _hash_call_paths(src_hash, globals, call_paths):
+    ret = src_hash
+    for path in call_paths:
+        ret = _hash_dependency(ret, _resolve_call_path(globals, path))
+    return ret
+
+
+# The call paths of a function only depend on its source code, so they are
+# memoized on disk by source hash. Dependencies are still resolved and hashed
+# in every process, so the result stays correct when they change.
+_CALL_PATHS_VERSION = 2
+# A single local file per cache directory, appended to and read once per
+# process, rather than a cache entry per function: it must be cheaper to look
+# up than the AST walk it saves, so it bypasses `TRITON_CACHE_MANAGER` (e.g. a
+# remote cache) and is not recorded in bundles.
+_call_paths_index: Dict[str, Dict[str, list]] = dict()
+_call_paths_lock = threading.Lock()
+
+
+def _call_paths_file():
+    from .cache import default_cache_dir
+    cache_dir = os.getenv("TRITON_CACHE_DIR", "").strip() or default_cache_dir()
+    return os.path.join(cache_dir, f"__call_paths_v{_CALL_PATHS_VERSION}__.jsonl")
+
+
+def _call_paths_of_file(path):
+    index = _call_paths_index.get(path)
+    if index is None:
+        index = _call_paths_index[path] = dict()
+        try:
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        index[entry["src_hash"]] = entry["call_paths"]
+                    except (ValueError, KeyError, TypeError):
+                        # e.g. a line still being written by another process
+                        continue
+        except OSError:
+            pass
+    return index
+
+
+def _load_call_paths(src_hash):
+    with _call_paths_lock:
+        return _call_paths_of_file(_call_paths_file()).get(src_hash)
+
+
+def _store_call_paths(src_hash, call_paths):
+    from .cache import default_cache_read_only
+    path = _call_paths_file()
+    with _call_paths_lock:
+        _call_paths_of_file(path)[src_hash] = call_paths
+    if default_cache_read_only():
+        return
+    line = json.dumps({"src_hash": src_hash, "call_paths": call_paths}) + "\n"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # a single append of a short line: concurrent writers don't interleave
+        with open(path, "a") as f:
+            f.write(line)
+    except OSError:
+        pass
+
+
+# -----------------------------------------------------------------------------
+# Kernel cache
+# -----------------------------------------------------------------------------
+
+_kernel_cache_clock = itertools.count()
+_kernel_cache_lock = threading.RLock()
+# id -> KernelCache of every live JITFunction cache
+_kernel_caches = weakref.WeakValueDictionary()
+
+
+def _capacity_from_env(name):
+    capacity = os.environ.get(name, "").strip()
+    return int(capacity) if capacity else None
+
+
+class KernelCache(dict):
+    """
+    Compiled kernels of one JITFunction on one device.
+
+    Inserting a kernel evicts the least recently used kernels once the owning
+    function holds more than `owner.cache_capacity` kernels (across devices) or
+    all functions together hold more than `JITFunction.global_cache_capacity`.
+    Evicted kernels have their module unloaded from the device once they are
+    no longer referenced.
+    """
+
+    def __init__(self, owner):
+        super().__init__()
+        self.owner = owner
+        self.last_use = dict()
+        # hits don't take the lock: `next` on an `itertools.count` is atomic
+        self._hits = itertools.count()
+        self.misses = 0
+        self.evictions = 0
+        with _kernel_cache_lock:
+            _kernel_caches[id(self)] = self
+
+    @property
+    def hits(self) -> int:
+        # `count(n)` is the next value to be returned, i.e. the number of hits so far
+        return int(repr(self._hits)[len("count("):-1])
+
+    def lookup(self, key):
+        # Launches hit the cache without locking: the recency of a kernel evicted
+        # concurrently may be recorded after its eviction, which is harmless.
+        kernel = self.get(key)
+        if kernel is None:
+            with _kernel_cache_lock:
+                self.misses += 1
+            return None
+        next(self._hits)
+        self.last_use[key] = next(_kernel_cache_clock)
+        return kernel
+
+    def __setitem__(self, key, kernel):
+        with _kernel_cache_lock:
+            super().__setitem__(key, kernel)
+            self.last_use[key] = next(_kernel_cache_clock)
+            _evict_lru(list(self.owner.cache.values()), self.owner.cache_capacity)
+            _evict_lru(list(_kernel_caches.values()), JITFunction.global_cache_capacity)
+
+    def __delitem__(self, key):
+        with _kernel_cache_lock:
+            super().__delitem__(key)
+            self.last_use.pop(key, None)
+
+    def pop(self, key, *default):
+        with _kernel_cache_lock:
+            self.last_use.pop(key, None)
+            return super().pop(key, *default)
+
+    def clear(self):
+        with _kernel_cache_lock:
+            super().clear()
+            self.last_use.clear()
+
+    def evict(self, key):
+        kernel = self.pop(key)
+        self.evictions += 1
+        # other threads may be launching the kernel: unload it once they're done with it
+        if hasattr(kernel, "_unload_when_unreachable"):
+            kernel._unload_when_unreachable()
+
+
+def _evict_lru(caches, capacity):
+    if capacity is None:
+        return
+    num_kernels = sum(len(cache) for cache in caches)
+    if num_kernels <= capacity:
+        return
+    entries = sorted(((cache.last_use.get(key, -1), key, cache) for cache in caches for key in cache),
+                     key=lambda entry: entry[0])
+    for _, key, cache in entries[:num_kernels - capacity]:
+        cache.evict(key)
+
+
+def _cache_stats(caches):
+    return {
+        "hits": sum(cache.hits for cache in caches),
+        "misses": sum(cache.misses for cache in caches),
+        "evictions": sum(cache.evictions for cache in caches),
+        "size": sum(len(cache) for cache in caches),
+    }
+
+
+def kernel_cache_stats():
+    """Returns hit, miss and eviction counts and the number of kernels cached by all JITFunctions."""
+    with _kernel_cache_lock:
+        return _cache_stats(list(_kernel_caches.values()))
 
 
 # -----------------------------------------------------------------------------
 # JITFunction
 # -----------------------------------------------------------------------------
 
+_compile_executor = None
+_compile_executor_lock = threading.Lock()
+
+
+def get_compile_executor():
+    """
+    Returns the executor used by `JITFunction.compile_async`. Its number of
+    threads can be set with the `TRITON_COMPILE_THREADS` environment variable.
+    """
+    global _compile_executor
+    with _compile_executor_lock:
+        if _compile_executor is None:
+            max_workers = int(os.environ.get("TRITON_COMPILE_THREADS", "0")) or min(8, os.cpu_count() or 1)
+            _compile_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="triton-compile")
+        return _compile_executor
+
+
+def set_compile_executor(executor):
+    """
+    Replaces the executor used by `JITFunction.compile_async`, e.g. with a
+    `concurrent.futures.ThreadPoolExecutor` owned by the application.
+    """
+    global _compile_executor
+    with _compile_executor_lock:
+        _compile_executor = executor
+
 
 def _normalize_ty(ty) -> str:
     if isinstance(ty, type):
@@ -133,19 +377,80 @@ class KernelArg:
 
     def specialization_key(self):
         assert not self.param.do_not_specialize
+        return _specialization_key(self.value)
 
-        if hasattr(self.value, "data_ptr"):
-            return (self.value.data_ptr() % JITFunction.divisibility == 0, )
 
-        if isinstance(self.value, int):
-            # bool is a subclass of int, so we don't check explicitly above.
-            return (
-                self.value % JITFunction.divisibility == 0,
-                self.value % JITFunction.divisibility_8 == 0,
-                self.value == 1,
-            )
+def _specialization_key(value):
+    if hasattr(value, "data_ptr"):
+        return (value.data_ptr() % JITFunction.divisibility == 0, )
+
+    if isinstance(value, int):
+        # bool is a subclass of int, so we don't check explicitly above.
+        return (
+            value % JITFunction.divisibility == 0,
+            value % JITFunction.divisibility_8 == 0,
+            value == 1,
+        )
+
+    return (False, )
 
-        return (False, )
+
+def _tuple_src(items):
+    if len(items) == 1:
+        return f"({items[0]}, )"
+    return f"({', '.join(items)})"
+
+
+def _make_binder(params):
+    """
+    Generates a function that binds the arguments of a launch to `params`
+    and computes everything `JITFunction.run` needs from them in one pass:
+
+        binder(*args, **kwargs) -> (bound_args, sig_key, constexpr_key, spec_key, launch_args)
+
+    `bound_args` holds the value of every parameter (defaults applied) and
+    `launch_args` only those that are passed to the kernel launcher. The keys
+    are identical to what `KernelArg.signature_key` and
+    `KernelArg.specialization_key` produce.
+    """
+    namespace = {"_triton_key_of": JITFunction._key_of, "_triton_spec_of": _specialization_key}
+    arg_decls = []
+    seen_kwonly = False
+    for param in params:
+        kind = param._param.kind
+        if kind not in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY):
+            raise TypeError(f"Unsupported parameter kind {kind} for @jit'ed parameter {param.name}")
+        if kind == inspect.Parameter.KEYWORD_ONLY and not seen_kwonly:
+            arg_decls.append("*")
+            seen_kwonly = True
+        if param.has_default:
+            namespace[f"_triton_default_{param.num}"] = param.default
+            arg_decls.append(f"{param.name}=_triton_default_{param.num}")
+        else:
+            arg_decls.append(param.name)
+
+    def signature_src(param):
+        annotation = param.annotation
+        if "Tensor" in annotation:
+            return f"{param.name}.dtype"
+        elif annotation == "bool":
+            return '"i1"'
+        elif annotation == "float":
+            return '"fp32"'
+        return f"_triton_key_of({param.name})"
+
+    bound_args = [p.name for p in params]
+    sig_key = [signature_src(p) for p in params if not p.is_constexpr]
+    constexpr_key = [p.name for p in params if p.is_constexpr]
+    spec_key = [f"_triton_spec_of({p.name})" for p in params if not p.do_not_specialize]
+    launch_args = [p.name for p in params if not p.is_constexpr]
+    returns = [_tuple_src(x) for x in (bound_args, sig_key, constexpr_key, spec_key, launch_args)]
+    src = f"""
+def binder({', '.join(arg_decls)}):
+    return {', '.join(returns)}
+"""
+    exec(src, namespace)
+    return namespace["binder"]
 
 
 class KernelInterface(Generic[T]):
@@ -170,6 +475,23 @@ class JITFunction(KernelInterface[T]):
     # So whether the LoadOp and StoreOp will lowering into TMA copy depend on whether the tensor stride is divisible by 8.
     # TODO: Make it more reasonable to handle multiple dtypes.
     divisibility_8 = 8
+    # Maximum number of compiled kernels kept in memory per function and across
+    # all functions; `None` means unbounded.
+    cache_capacity = _capacity_from_env("TRITON_KERNEL_CACHE_CAPACITY")
+    global_cache_capacity = _capacity_from_env("TRITON_KERNEL_CACHE_GLOBAL_CAPACITY")
+    # Opt-in diagnostics: explain why each new specialization was compiled, and
+    # warn about kernels compiled more than `recompile_limit[0]` times within
+    # `recompile_limit[1]` seconds. Explanations go to `recompile_hook` if set,
+    # to stderr otherwise.
+    explain_recompiles = os.environ.get("TRITON_EXPLAIN_RECOMPILES", "0") == "1"
+    recompile_limit = (8, 60.0)
+    recompile_hook = None
+    # Number of specializations after which parameters whose specialization
+    # keeps changing are treated as `do_not_specialize`; `None` means unbounded.
+    specialization_budget = _capacity_from_env("TRITON_SPECIALIZATION_BUDGET")
+    # Called with each specialization before it is compiled, e.g. to record it
+    # for precompilation (see `triton.runtime.precompile`).
+    compile_recorder = None
 
     @staticmethod
     def _key_of(arg):
@@ -331,8 +653,80 @@ class JITFunction(KernelInterface[T]):
             already_compiled=False,
         )
 
+    def _apply_specialization_budget(self):
+        budget = self.specialization_budget
+        if budget is None or self.num_variants < budget:
+            return
+        # parameters whose specialization key took more than one value; constexprs
+        # are compiled per value regardless, so despecializing them saves nothing
+        churning = [
+            param for param in self.params if not param.do_not_specialize and not param.is_constexpr
+            and len(self.specializations_seen.get(param.num, ())) > 1
+        ]
+        if not churning:
+            return
+        for param in churning:
+            param.do_not_specialize = True
+        self.do_not_specialize = [param.num for param in self.params if param.do_not_specialize]
+        self.binder = None
+
+    def _compile_and_cache(self, bound_args, key, device, target, options):
+        from ..compiler import compile, ASTSource
+        # another thread may have compiled this key while we were waiting to lead
+        kernel = self.cache[device].get(key)
+        if kernel is not None:
+            return kernel
+        self._apply_specialization_budget()
+        # `key` was computed before parameters may have been despecialized
+        spec_key = tuple(
+            _specialization_key(arg) for param, arg in zip(self.params, bound_args) if not param.do_not_specialize)
+        if spec_key != key[2]:
+            key = (key[0], key[1], spec_key, key[3])
+            kernel = self.cache[device].get(key)
+            if kernel is not None:
+                return kernel
+        self.num_variants += 1
+        for param, arg in zip(self.params, bound_args):
+            if not param.do_not_specialize:
+                self.specializations_seen.setdefault(param.num, set()).add(_specialization_key(arg))
+        configs = (self._get_config(*bound_args), )
+        constants = {
+            param.num: arg
+            for param, arg in zip(self.params, bound_args)
+            if param.is_constexpr or param.num in configs[0].equal_to_1 or arg is None
+        }
+        for i, arg in constants.items():
+            if callable(arg):
+                raise TypeError(f"Callable constexpr at index {i} is not supported")
+
+        # Build kernel signature -- doesn't include constexpr arguments.
+        signature = {
+            param.num: self._type_of(self._key_of(arg))
+            for param, arg in zip(self.params, bound_args)
+            if not param.is_constexpr
+        }
+
+        if JITFunction.explain_recompiles:
+            self.recompile_tracker.record(key, list(self.cache[device].keys()), JITFunction.recompile_limit,
+                                          JITFunction.recompile_hook)
+        if self._call_hook(key, signature, device, constants, options.num_warps, options.num_ctas, options.num_stages,
+                           options.enable_warp_specialization, options.enable_fp_fusion, options.extern_libs,
+                           configs):
+            return None
+        if JITFunction.compile_recorder is not None:
+            JITFunction.compile_recorder(self, signature, constants, configs[0], options, target)
+        # compile the kernel
+        src = ASTSource(self, signature, constants, configs[0])
+        kernel = compile(
+            src,
+            target=target,
+            options=options.__dict__,
+        )
+        self.cache[device][key] = kernel
+        return kernel
+
     def run(self, *args, grid, warmup, **kwargs):
-        from ..compiler import CompiledKernel, compile, ASTSource, make_backend
+        from ..compiler import CompiledKernel, make_backend
         # deprecated arguments
         assert "device_type" not in kwargs, "device_type option is deprecated; current target will be used"
         assert "device" not in kwargs, "device option is deprecated; current device will be used"
@@ -345,68 +739,50 @@ class JITFunction(KernelInterface[T]):
         kwargs["debug"] = self.debug
         options = backend.parse_options(kwargs)
         # bind non-reserved keyword args and set defaults
+        all_kwargs = kwargs
         kwargs = {k: v for k, v in kwargs.items() if not k in options.__dict__}
-        bound_args = self.signature.bind(*args, **kwargs)
-        bound_args.apply_defaults()
-        assert len(bound_args.arguments) == len(self.params)
+        if self.binder is None:
+            self.binder = _make_binder(self.params)
+        bound_args, sig_key, constexpr_key, spec_key, launch_args = self.binder(*args, **kwargs)
         # canonicalize grid
         assert grid is not None
         if callable(grid):
             # Arguments are passed as a dict to `grid`, by contract.
             # TODO(jlebar): In the new launch API, pass the compiler flags as a
             # second parameter to `grid`.
-            grid = grid(dict(bound_args.arguments))
+            grid = grid(dict(zip(self.arg_names, bound_args)))
         grid_size = len(grid)
         grid_0 = grid[0]
         grid_1 = grid[1] if grid_size > 1 else 1
         grid_2 = grid[2] if grid_size > 2 else 1
         # compute cache key
-        args = [KernelArg(arg_value, param) for (_, arg_value), param in zip(bound_args.arguments.items(), self.params)]
-        sig_key = tuple(arg.signature_key() for arg in args if not arg.param.is_constexpr)
-        spec_key = tuple(arg.specialization_key() for arg in args if not arg.param.do_not_specialize)
-        constexpr_key = tuple(arg.value for arg in args if arg.param.is_constexpr)
         key = (sig_key, constexpr_key, spec_key, options)
-        # Kernel is not cached; we have to compile.
-        if key not in self.cache[device]:
-            configs = (self._get_config(*[arg.value for arg in args]), )
-            constants = {
-                arg.param.num: arg.value
-                for arg in args
-                if arg.param.is_constexpr or arg.param.num in configs[0].equal_to_1 or arg.value is None
-            }
-            for i, arg in constants.items():
-                if callable(arg):
-                    raise TypeError(f"Callable constexpr at index {i} is not supported")
-
-            # Build kernel signature -- doesn't include constexpr arguments.
-            signature = {
-                arg.param.num: self._type_of(self._key_of(arg.value))
-                for arg in args
-                if not arg.param.is_constexpr
-            }
-
-            if self._call_hook(key, signature, device, constants, options.num_warps, options.num_ctas,
-                               options.num_stages, options.enable_warp_specialization, options.enable_fp_fusion,
-                               options.extern_libs, configs):
+        kernel = self.cache[device].lookup(key)
+        # Kernel is not cached; we have to compile. Only one thread compiles
+        # a given key, the others wait for it and pick up the result.
+        if kernel is None:
+            pending = self.pending.get((device, key))
+            if pending is None:
+                kernel = self.compile_flight.do(
+                    (device, key), lambda: self._compile_and_cache(bound_args, key, device, target, options))
+            else:
+                # being compiled in the background by `compile_async`
+                future, fallback = pending
+                if fallback is not None and not warmup and not future.done():
+                    all_kwargs = {k: v for k, v in all_kwargs.items() if k != "debug"}
+                    return fallback[grid](*args, **all_kwargs)
+                kernel = future.result()
+            if kernel is None:
                 return None
-            # compile the kernel
-            src = ASTSource(self, signature, constants, configs[0])
-            self.cache[device][key] = compile(
-                src,
-                target=target,
-                options=options.__dict__,
-            )
 
-        kernel = self.cache[device][key]
         if not warmup:
-            args = [arg.value for arg in args if not arg.param.is_constexpr]
             metadata = kernel.metadata
             kernel.run(grid_0, grid_1, grid_2, metadata.num_warps,
                        metadata.num_ctas,  # number of warps/ctas per instance
                        metadata.cluster_dims[0], metadata.cluster_dims[1], metadata.cluster_dims[2],  # cluster
                        metadata.shared, stream, kernel.function, CompiledKernel.launch_enter_hook,
                        CompiledKernel.launch_exit_hook, metadata,
-                       *driver.assemble_tensormap_to_arg(metadata.tensormaps_info, args))
+                       *driver.assemble_tensormap_to_arg(metadata.tensormaps_info, launch_args))
         return kernel
 
     def __init__(self, fn, version=None, do_not_specialize=None, debug=None, noinline=None):
@@ -428,7 +804,20 @@ class JITFunction(KernelInterface[T]):
         self.src = textwrap.dedent(inspect.getsource(fn))
         self.src = self.src[self.src.find("def"):]
         # cache of just-in-time compiled kernels
-        self.cache = defaultdict(dict)
+        self.cache = defaultdict(lambda: KernelCache(self))
+        # argument binder specialized to `self.params`; generated on first launch
+        self.binder = None
+        # deduplicates concurrent compilations of the same cache key
+        self.compile_flight = SingleFlight()
+        # (device, key) -> (future, fallback) of specializations being compiled by `compile_async`
+        self.pending = dict()
+        self.pending_lock = threading.Lock()
+        # explains new specializations when `JITFunction.explain_recompiles` is set
+        self.recompile_tracker = RecompileTracker(self)
+        # number of specializations compiled so far and, for each parameter,
+        # the specialization keys they were compiled for
+        self.num_variants = 0
+        self.specializations_seen = dict()
         self.hash = None
         # JITFunction can be instantiated as kernel
         # when called with a grid using __getitem__
@@ -447,18 +836,84 @@ class JITFunction(KernelInterface[T]):
         self.__globals__ = fn.__globals__
         self.__module__ = fn.__module__
 
+    def cache_stats(self):
+        """Returns hit, miss and eviction counts and the number of kernels cached by this function."""
+        with _kernel_cache_lock:
+            return _cache_stats(list(self.cache.values()))
+
     @property
     def cache_key(self):
         # TODO : hash should be attribute of `self`
         if self.hash is None:
-            dependencies_finder = DependenciesFinder(globals=self.__globals__, src=self.src)
-            dependencies_finder.visit(self.parse())
-            self.hash = dependencies_finder.ret + str(self.starting_line_number)
+            src_hash = hashlib.sha1(self.src.encode("utf-8")).hexdigest()
+            call_paths = _load_call_paths(src_hash)
+            if call_paths is not None:
+                ret = _hash_call_paths(src_hash, self.__globals__, call_paths)
+            else:
+                dependencies_finder = DependenciesFinder(globals=self.__globals__, src=self.src)
+                dependencies_finder.visit(self.parse())
+                if dependencies_finder.call_paths is not None:
+                    _store_call_paths(src_hash, dependencies_finder.call_paths)
+                ret = dependencies_finder.ret
+            self.hash = ret + str(self.starting_line_number)
         return self.hash
 
-    def warmup(self, *args, grid, **kwargs):
+    def warmup(self, *args, grid, background=False, **kwargs):
+        """
+        Compiles the kernel for `args` without launching it. With
+        `background=True`, returns the future of `compile_async` instead of
+        blocking until compilation is done.
+        """
+        if background:
+            return self.compile_async(*args, **kwargs)
         return self.run(grid=grid, warmup=True, *map(MockTensor.wrap_dtype, args), **kwargs)
 
+    def compile_async(self, *args, fallback=None, **kwargs):
+        """
+        Compiles the kernel for `args` on the background compile executor and
+        returns a `concurrent.futures.Future` of the `CompiledKernel`.
+
+        Launches that need this specialization while it is still compiling
+        wait for it, or, if `fallback` is given, launch `fallback[grid](*args, **kwargs)` instead.
+        """
+        from ..compiler import make_backend
+        device = driver.get_current_device()
+        target = driver.get_current_target()
+        backend = make_backend(target)
+        kwargs["debug"] = self.debug
+        options = backend.parse_options(kwargs)
+        kwargs = {k: v for k, v in kwargs.items() if not k in options.__dict__}
+        if self.binder is None:
+            self.binder = _make_binder(self.params)
+        bound_args, sig_key, constexpr_key, spec_key, _ = self.binder(*map(MockTensor.wrap_dtype, args), **kwargs)
+        key = (sig_key, constexpr_key, spec_key, options)
+        kernel = self.cache[device].get(key)
+        if kernel is not None:
+            future = Future()
+            future.set_result(kernel)
+            return future
+        with self.pending_lock:
+            pending = self.pending.get((device, key))
+            if pending is not None:
+                return pending[0]
+            future = Future()
+            self.pending[(device, key)] = (future, fallback)
+
+        def compile_in_background():
+            try:
+                kernel = self.compile_flight.do(
+                    (device, key), lambda: self._compile_and_cache(bound_args, key, device, target, options))
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(kernel)
+            finally:
+                with self.pending_lock:
+                    del self.pending[(device, key)]
+
+        get_compile_executor().submit(compile_in_background)
+        return future
+
     # we do not parse `src` in the constructor because
     # the user might want to monkey-patch self.src dynamically.
     # Our unit tests do this, for example.
@@ -610,3 +1065,8 @@ def reinterpret(tensor, dtype):
         return TensorWrapper(tensor, dtype)
     else:
         raise TypeError(f"Cannot reinterpret a {type(tensor)}.")
+
+
+if os.environ.get("TRITON_PRECOMPILE_RECORD", "").strip():
+    from .precompile import ManifestRecorder
+    JITFunction.compile_recorder = ManifestRecorder(os.environ["TRITON_PRECOMPILE_RECORD"].strip())
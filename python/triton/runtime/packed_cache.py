@@ -0,0 +1,292 @@
+"""
+A `CacheManager` that keeps the whole cache in one append-only file.
+
+Select it with `TRITON_CACHE_MANAGER=triton.runtime.packed_cache:PackedCacheManager`.
+
+The pack (`$TRITON_CACHE_DIR/cache.pack`) is a header followed by records:
+
+    header crc32 (u32) | data crc32 (u32) | key length (u32) | name length (u32) | data length (u64) | key | name | data
+
+A record for a `(key, name)` that already exists supersedes the older one. Each
+process memory-maps the pack and indexes its records once (reading only their
+headers), then picks up records appended by other processes when a lookup
+misses. Lookups are served from the index without touching the file system.
+
+Callers of the `CacheManager` interface expect paths (e.g. to `dlopen` launchers),
+so the data of an entry is extracted to a local directory the first time this
+process returns it. Extracted files are named after the crc32 of their data,
+so a record superseded by another process (possibly on another host sharing
+the pack) is never mistaken for the file extracted from the older one.
+
+`get_group` returns the paths of all files of a group, so the first process of
+a host to load a kernel extracts all of its files, including the intermediate
+stages that `CompiledKernel.asm` would only read on demand; processes after it
+only check that the files exist. Set `TRITON_CACHE_ARTIFACTS=minimal` to store
+(and extract) only what is needed to launch kernels.
+"""
+import json
+import mmap
+import os
+import random
+import struct
+import tempfile
+import threading
+import zlib
+from typing import Dict, Optional, Tuple
+
+from filelock import FileLock
+
+from .cache import CacheManager, default_cache_dir
+
+_MAGIC = b"TRITONPACK1\n"
+_RECORD = struct.Struct("<IIIIQ")
+# compact the pack once more than half of it (and at least this many bytes) is superseded records
+_COMPACT_MIN_DEAD_BYTES = 64 * 2**20
+
+
+class _Pack:
+
+    def __init__(self, path, extract_dir):
+        self.path = path
+        self.extract_dir = extract_dir
+        self.lock = threading.RLock()
+        self.file_lock = FileLock(f"{path}.lock")
+        # (key, name) -> offset, length and crc32 of the data in the pack
+        self.index: Dict[Tuple[str, str], Tuple[int, int, int]] = dict()
+        # entries whose data was checked against its crc / written to `extract_dir` by this process
+        self.verified = set()
+        self.extracted = set()
+        self.dead_bytes = 0
+        self.inode = None
+        self.size = 0
+        self.scanned = 0
+        self.mm = None
+
+    def _create(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self.file_lock:
+            if not os.path.exists(self.path):
+                tmp_path = f"{self.path}.tmp.pid_{os.getpid()}_{random.randint(0, 1000000)}"
+                with open(tmp_path, "wb") as f:
+                    f.write(_MAGIC)
+                os.replace(tmp_path, self.path)
+
+    def _map(self):
+        with open(self.path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if st.st_ino != self.inode:
+                # new pack (e.g. compacted by another process): forget everything
+                self.index.clear()
+                self.verified.clear()
+                self.extracted.clear()
+                self.dead_bytes = 0
+                self.scanned = len(_MAGIC)
+            if self.mm is not None:
+                self.mm.close()
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.inode = st.st_ino
+            self.size = len(self.mm)
+        if self.mm[:len(_MAGIC)] != _MAGIC:
+            raise RuntimeError(f"{self.path} is not a Triton cache pack")
+
+    def _scan(self):
+        mm, offset = self.mm, self.scanned
+        while offset + _RECORD.size <= self.size:
+            header_crc, data_crc, key_len, name_len, data_len = _RECORD.unpack_from(mm, offset)
+            start = offset + _RECORD.size
+            data_start = start + key_len + name_len
+            end = data_start + data_len
+            # stop at a record that is still being written
+            if data_start > self.size or zlib.crc32(mm[offset + 4:data_start]) != header_crc or end > self.size:
+                break
+            key = mm[start:start + key_len].decode("utf-8")
+            name = mm[start + key_len:data_start].decode("utf-8")
+            old = self.index.get((key, name))
+            if old is not None:
+                self.dead_bytes += _RECORD.size + key_len + name_len + old[1]
+                self.verified.discard((key, name))
+                self.extracted.discard((key, name))
+            self.index[(key, name)] = (data_start, data_len, data_crc)
+            offset = end
+        self.scanned = offset
+
+    def refresh(self):
+        with self.lock:
+            if self.mm is None:
+                self._create()
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                self._create()
+                st = os.stat(self.path)
+            if st.st_ino != self.inode or st.st_size != self.size:
+                self._map()
+                self._scan()
+
+    def lookup(self, key, name) -> Optional[Tuple[int, int, int]]:
+        with self.lock:
+            loc = self.index.get((key, name))
+            if loc is None:
+                self.refresh()
+                loc = self.index.get((key, name))
+            return loc
+
+    def read(self, key, name) -> Optional[bytes]:
+        with self.lock:
+            loc = self.lookup(key, name)
+            if loc is None:
+                return None
+            offset, length, crc = loc
+            data = self.mm[offset:offset + length]
+            if (key, name) not in self.verified:
+                if zlib.crc32(data) != crc:
+                    # the data of this record is not fully written yet
+                    return None
+                self.verified.add((key, name))
+            return data
+
+    def extracted_path(self, key, name, crc) -> str:
+        return os.path.join(self.extract_dir, key, f"{crc:08x}", name)
+
+    def entry_of(self, path) -> Optional[Tuple[str, str]]:
+        """Returns the key and name of the entry extracted to `path`, if any."""
+        if not path.startswith(self.extract_dir + os.sep):
+            return None
+        parts = os.path.relpath(path, self.extract_dir).split(os.sep)
+        return (parts[0], parts[2]) if len(parts) == 3 else None
+
+    def extract(self, key, name) -> Optional[str]:
+        with self.lock:
+            loc = self.lookup(key, name)
+            if loc is None:
+                return None
+            path = self.extracted_path(key, name, loc[2])
+            if (key, name) in self.extracted:
+                return path
+            data = self.read(key, name)
+            if data is None:
+                return None
+            # another process may have extracted it already
+            if not os.path.exists(path):
+                _write_file(path, data)
+            self.extracted.add((key, name))
+        return path
+
+    def append(self, key, name, data: bytes) -> str:
+        key_bytes, name_bytes = key.encode("utf-8"), name.encode("utf-8")
+        header = _RECORD.pack(0, zlib.crc32(data), len(key_bytes), len(name_bytes), len(data))[4:]
+        header += key_bytes + name_bytes
+        record = struct.pack("<I", zlib.crc32(header)) + header + data
+        with self.lock:
+            with self.file_lock:
+                self.refresh()
+                if self.scanned != self.size:
+                    # a process died while appending: don't append after its partial record
+                    self._compact()
+                with open(self.path, "ab") as f:
+                    f.write(record)
+                self.refresh()
+            path = self.extracted_path(key, name, zlib.crc32(data))
+            _write_file(path, data)
+            self.verified.add((key, name))
+            self.extracted.add((key, name))
+            if self.dead_bytes > _COMPACT_MIN_DEAD_BYTES and 2 * self.dead_bytes > self.size:
+                self.compact()
+        return path
+
+    def _compact(self):
+        # Writes a new pack rather than rewriting this one in place, so that
+        # other processes can keep reading their mapping of the old one.
+        tmp_path = f"{self.path}.tmp.pid_{os.getpid()}_{random.randint(0, 1000000)}"
+        with open(tmp_path, "wb") as f:
+            f.write(_MAGIC)
+            for (key, name), (offset, length, _) in sorted(self.index.items(), key=lambda item: item[1][0]):
+                start = offset - len(key.encode("utf-8")) - len(name.encode("utf-8")) - _RECORD.size
+                f.write(self.mm[start:offset + length])
+        os.replace(tmp_path, self.path)
+        self.refresh()
+
+    def compact(self) -> int:
+        """Rewrites the pack without superseded records; returns the number of bytes saved."""
+        with self.lock, self.file_lock:
+            self.refresh()
+            old_size = self.size
+            self._compact()
+            return old_size - self.size
+
+
+def _write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp.pid_{os.getpid()}_{random.randint(0, 1000000)}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+_packs: Dict[str, _Pack] = dict()
+_packs_lock = threading.Lock()
+
+
+def _get_pack(cache_dir) -> _Pack:
+    path = os.path.join(cache_dir, "cache.pack")
+    with _packs_lock:
+        pack = _packs.get(path)
+        if pack is None:
+            # the pack may live on a network file system: extract entries locally
+            default_extract_dir = os.path.join(tempfile.gettempdir(), f"triton-pack-{os.getuid()}")
+            extract_dir = os.getenv("TRITON_PACK_EXTRACT_DIR", "").strip() or default_extract_dir
+            extract_dir = os.path.join(extract_dir, zlib.crc32(path.encode("utf-8")).to_bytes(4, "little").hex())
+            pack = _packs[path] = _Pack(path, extract_dir)
+        return pack
+
+
+class PackedCacheManager(CacheManager):
+
+    def __init__(self, key, override=False, dump=False):
+        # overrides and dumps are meant to be inspected and edited by hand
+        if override or dump:
+            raise RuntimeError("PackedCacheManager only supports the kernel cache; "
+                               "unset TRITON_CACHE_MANAGER to use TRITON_KERNEL_OVERRIDE or TRITON_KERNEL_DUMP")
+        self.key = key
+        self.cache_dir = os.getenv("TRITON_CACHE_DIR", "").strip() or default_cache_dir()
+        self.pack = _get_pack(self.cache_dir)
+
+    def has_file(self, filename) -> bool:
+        return self.pack.lookup(self.key, filename) is not None
+
+    def get_file(self, filename) -> Optional[str]:
+        return self.pack.extract(self.key, filename)
+
+    def get_group(self, filename: str) -> Optional[Dict[str, str]]:
+        data = self.pack.read(self.key, f"__grp__{filename}")
+        if data is None:
+            return None
+        child_paths = json.loads(data).get("child_paths", None)
+        # Invalid group data.
+        if child_paths is None:
+            return None
+        result = {}
+        for c, p in child_paths.items():
+            if not os.path.isabs(p):
+                # "<key>/<name>" of an entry of the pack
+                p = self.pack.extract(*p.split("/", 1))
+            elif not os.path.exists(p):
+                p = None
+            if p is not None:
+                result[c] = p
+        return result
+
+    def put_group(self, filename: str, group: Dict[str, str]):
+        # refer to entries of the pack by key and name: processes may extract them to different places
+        entries = {c: self.pack.entry_of(p) for c, p in group.items()}
+        group = {c: p if entries[c] is None else "/".join(entries[c]) for c, p in group.items()}
+        grp_contents = json.dumps({"child_paths": group})
+        return self.put(grp_contents, f"__grp__{filename}", binary=False)
+
+    def put(self, data, filename, binary=True) -> str:
+        if not isinstance(data, bytes):
+            data = str(data).encode("utf-8")
+        return self.pack.append(self.key, filename, data)
+
+    def compact(self) -> int:
+        return self.pack.compact()
@@ -0,0 +1,195 @@
+"""
+Profile-guided precompilation: record the kernels a workload compiles, then
+compile them all up front in the next runs instead of on first launch.
+
+    TRITON_PRECOMPILE_RECORD=kernels.jsonl python serve.py     # record
+    python -m triton.runtime.precompile kernels.jsonl           # precompile (e.g. when building an image)
+    python -m triton.runtime.precompile kernels.jsonl --verify  # check that the cache has all of them
+
+or, at startup, `triton.runtime.precompile.replay("kernels.jsonl")`.
+
+The manifest has one JSON object per line for each compiled specialization:
+the module and name of the `@triton.jit` function, its signature, constexprs
+and specialization (`AttrsDescriptor`), the compile options and the target.
+Replaying it goes through `ASTSource` and `triton.compile`, i.e. it populates
+the on-disk cache exactly as the launches would; the first launch of each
+kernel then only loads it from the cache.
+
+Kernels must be importable by module and name, so kernels defined in
+`__main__` or inside functions are not recorded.
+"""
+import importlib
+import json
+import threading
+import warnings
+from concurrent.futures import Executor
+from typing import Dict, List, Optional
+
+from .jit import JITFunction, get_compile_executor
+
+
+def _encode_constant(value):
+    from ..language import dtype
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if type(value) is dtype:
+        return {"dtype": value.name}
+    raise TypeError(f"constexpr of type {type(value).__name__} can't be recorded")
+
+
+def _decode_constant(value):
+    from ..language import dtype
+    if isinstance(value, dict):
+        return dtype(value["dtype"])
+    return value
+
+
+def _tuples(value):
+    # JSON has no tuples, but options (e.g. `cluster_dims`) are hashed with their repr
+    if isinstance(value, list):
+        return tuple(_tuples(v) for v in value)
+    return value
+
+
+class ManifestRecorder:
+    """
+    Appends the specializations compiled by `JITFunction`s to `path`. Set as
+    `JITFunction.compile_recorder`, or by setting `TRITON_PRECOMPILE_RECORD`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.seen = set()
+        self.warned = set()
+
+    def __call__(self, fn, signature, constants, attrs, options, target):
+        name = fn.fn.__qualname__
+        if fn.module == "__main__" or "<locals>" in name:
+            return
+        try:
+            entry = {
+                "module": fn.module,
+                "name": name,
+                "signature": signature,
+                "constants": {i: _encode_constant(v) for i, v in constants.items()},
+                "attrs": {k: sorted(v) for k, v in attrs.__dict__.items()},
+                "options": options.__dict__,
+                "target": target,
+            }
+            line = json.dumps(entry, sort_keys=True)
+        except TypeError as e:
+            if name not in self.warned:
+                self.warned.add(name)
+                warnings.warn(f"Not recording {fn.module}.{name} in {self.path}: {e}")
+            return
+        with self.lock:
+            if line in self.seen:
+                return
+            self.seen.add(line)
+            # a line per write, so that concurrent recorders don't interleave
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+
+def load_manifest(path) -> List[dict]:
+    """Returns the distinct entries of a manifest."""
+    entries, seen = [], set()
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line and line not in seen:
+                seen.add(line)
+                entries.append(json.loads(line))
+    return entries
+
+
+def _find_kernel(module_name, name) -> JITFunction:
+    obj = importlib.import_module(module_name)
+    for attr in name.split("."):
+        obj = getattr(obj, attr)
+    # unwrap `@triton.autotune`, `@triton.heuristics`, ...
+    while not isinstance(obj, JITFunction) and hasattr(obj, "fn"):
+        obj = obj.fn
+    if not isinstance(obj, JITFunction):
+        raise TypeError(f"{module_name}.{name} is not a @triton.jit function")
+    return obj
+
+
+def _make_source(entry):
+    from ..compiler import ASTSource, AttrsDescriptor
+    fn = _find_kernel(entry["module"], entry["name"])
+    signature = {int(i): ty for i, ty in entry["signature"].items()}
+    constants = {int(i): _decode_constant(v) for i, v in entry["constants"].items()}
+    attrs = AttrsDescriptor(**{k: set(v) for k, v in entry["attrs"].items()})
+    return ASTSource(fn, signature, constants, attrs)
+
+
+def _is_cached(src, target, options) -> bool:
+    from ..compiler.compiler import _compile_cache_key, make_backend
+    from .cache import get_cache_manager
+    backend = make_backend(target)
+    options = backend.parse_options(dict(options, **src.parse_options()))
+    metadata_filename = f"{src.name}.json"
+    group = get_cache_manager(_compile_cache_key(src, backend, options)).get_group(metadata_filename)
+    return group is not None and metadata_filename in group
+
+
+def replay(path, verify: bool = False, target=None, executor: Optional[Executor] = None) -> Dict[str, list]:
+    """
+    Compiles every entry of the manifest `path` recorded for `target` (the
+    current target by default) on `executor` (the executor of
+    `JITFunction.compile_async` by default), or, with `verify=True`, only
+    checks that they are in the cache.
+
+    Returns the entries by outcome: `compiled` (or `cached` and `missing` when
+    verifying), `failed` (as `(entry, exception)` pairs) and `skipped`, for the
+    entries of other targets.
+    """
+    from ..compiler import compile
+    from .driver import driver
+    target = tuple(target or driver.get_current_target())
+    executor = executor or get_compile_executor()
+    results = {"compiled": [], "cached": [], "missing": [], "failed": [], "skipped": []}
+    futures = []
+    for entry in load_manifest(path):
+        if tuple(entry["target"]) != target:
+            results["skipped"].append(entry)
+            continue
+        options = {k: _tuples(v) for k, v in entry["options"].items()}
+
+        def run(entry=entry, options=options):
+            src = _make_source(entry)
+            if verify:
+                return "cached" if _is_cached(src, target, options) else "missing"
+            compile(src, target=target, options=options)
+            return "compiled"
+
+        futures.append((entry, executor.submit(run)))
+    for entry, future in futures:
+        try:
+            results[future.result()].append(entry)
+        except Exception as e:
+            results["failed"].append((entry, e))
+    return results
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m triton.runtime.precompile",
+                                     description="Compile the kernels recorded with TRITON_PRECOMPILE_RECORD.")
+    parser.add_argument("manifest")
+    parser.add_argument("--verify", action="store_true", help="only check that the kernels are in the cache")
+    args = parser.parse_args(argv)
+    results = replay(args.manifest, verify=args.verify)
+    for entry, e in results["failed"]:
+        print(f"failed: {entry['module']}.{entry['name']}: {e}")
+    for entry in results["missing"]:
+        print(f"missing: {entry['module']}.{entry['name']} {entry['signature']}")
+    print(", ".join(f"{len(entries)} {outcome}" for outcome, entries in results.items() if entries) or "empty manifest")
+    if results["failed"] or results["missing"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import sys
+import time
+import warnings
+from collections import deque
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+# Names of the entries of `KernelArg.specialization_key`, by key length.
+# Pointers only report their alignment and unspecialized types report `(False, )`.
+_SPECIALIZATION_PROPERTIES = {
+    1: ("divisible by 16", ),
+    3: ("divisible by 16", "divisible by 8", "equal to 1"),
+}
+
+
+class RecompileWarning(UserWarning):
+    pass
+
+
+@dataclass
+class KeyChange:
+    arg: str
+    property: str
+    old: object
+    new: object
+
+    def __str__(self):
+        return f"{self.arg}: {self.property} {self.old!r} -> {self.new!r}"
+
+
+@dataclass
+class Recompile:
+    """A compilation of a new specialization of a kernel that already had compiled variants."""
+    fn_name: str
+    key: tuple
+    nearest_key: Optional[tuple]
+    changes: List[KeyChange]
+    num_variants: int
+    time: float = field(default_factory=time.time)
+
+    def __str__(self):
+        changes = ", ".join(str(change) for change in self.changes) or "no differences in the cache key"
+        return f"recompiling {self.fn_name} (variant {self.num_variants + 1}): {changes}"
+
+
+def diff_keys(params, old_key, new_key) -> List[KeyChange]:
+    """
+    Lists the arguments and properties that differ between two
+    `(sig_key, constexpr_key, spec_key, options)` keys of `JITFunction.run`.
+    """
+    old_sig, old_constexprs, old_spec, old_options = old_key
+    new_sig, new_constexprs, new_spec, new_options = new_key
+    changes = []
+    sig_params = [p for p in params if not p.is_constexpr]
+    for param, old, new in zip(sig_params, old_sig, new_sig):
+        if old != new:
+            changes.append(KeyChange(param.name, "dtype", old, new))
+    constexpr_params = [p for p in params if p.is_constexpr]
+    for param, old, new in zip(constexpr_params, old_constexprs, new_constexprs):
+        if old != new:
+            changes.append(KeyChange(param.name, "constexpr value", old, new))
+    spec_params = [p for p in params if not p.do_not_specialize]
+    for param, old, new in zip(spec_params, old_spec, new_spec):
+        if old == new:
+            continue
+        if len(old) != len(new):
+            changes.append(KeyChange(param.name, "specialization", old, new))
+            continue
+        for name, old_prop, new_prop in zip(_SPECIALIZATION_PROPERTIES[len(old)], old, new):
+            if old_prop != new_prop:
+                changes.append(KeyChange(param.name, name, old_prop, new_prop))
+    if old_options != new_options:
+        for name, old in old_options.__dict__.items():
+            new = new_options.__dict__.get(name)
+            if old != new:
+                changes.append(KeyChange("<options>", name, old, new))
+    return changes
+
+
+class RecompileTracker:
+    """
+    Records the new specializations compiled for one JITFunction and explains
+    each of them relative to the most similar variant already compiled.
+    """
+
+    def __init__(self, fn, max_events=128):
+        self.fn = fn
+        self.events = deque(maxlen=max_events)
+        self.compile_times = deque()
+        self.flagged = False
+
+    def record(self, key, existing_keys, limit: Tuple[int, float], hook=None) -> Optional[Recompile]:
+        now = time.time()
+        max_compiles, window = limit
+        self.compile_times.append(now)
+        while self.compile_times and self.compile_times[0] < now - window:
+            self.compile_times.popleft()
+        if len(self.compile_times) > max_compiles and not self.flagged:
+            self.flagged = True
+            name = self.fn.__name__
+            warnings.warn(
+                f"{name} was compiled {len(self.compile_times)} times in the last {window:g}s; "
+                f"see `{name}.recompile_tracker.events` for the arguments that keep changing", RecompileWarning)
+        # keys compiled before some parameters were despecialized are not comparable
+        existing_keys = [old for old in existing_keys if len(old[2]) == len(key[2])]
+        if not existing_keys:
+            return None
+        candidates = [(diff_keys(self.fn.params, old, key), old) for old in existing_keys]
+        changes, nearest_key = min(candidates, key=lambda candidate: len(candidate[0]))
+        event = Recompile(self.fn.__name__, key, nearest_key, changes, len(existing_keys), now)
+        self.events.append(event)
+        if hook is not None:
+            hook(event)
+        else:
+            print(f"[triton] {event}", file=sys.stderr)
+        return event
@@ -0,0 +1,312 @@
+"""
+A `CacheManager` that backs the local file cache with a shared remote store.
+
+Select it with `TRITON_CACHE_MANAGER=triton.runtime.remote_cache:RemoteCacheManager`
+and point `TRITON_REMOTE_CACHE_URL` at the store, e.g. `http://cache-host:8000/triton`.
+
+Lookups check the local `FileCacheManager` first and, on a miss, fetch the file
+from the store into it; a 404 is remembered for `_MISS_TTL` seconds. Files
+written locally are uploaded in the background; when the store falls behind by
+more than `_MAX_PENDING_UPLOADS` files, further uploads are dropped, and at exit
+pending uploads are waited for at most `_EXIT_DRAIN_TIMEOUT` seconds.
+The protocol is plain HTTP on `<url>/<key>/<filename>`:
+
+    GET  -> 200 with the file, or 404
+    PUT  -> stores the request body (any 2xx status)
+
+Groups are uploaded as the list of their files (paths are only meaningful on
+the host that wrote them) after the files themselves.
+
+`python -m triton.runtime.remote_cache serve DIR` runs a reference store that
+keeps its files in `DIR`.
+"""
+import atexit
+import functools
+import json
+import os
+import queue
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+from .cache import CacheManager, FileCacheManager
+
+# after a request fails, the store is not contacted again for this many seconds
+_RETRY_AFTER = 60.0
+# a file the store doesn't have is not asked for again for this many seconds
+_MISS_TTL = 30.0
+_MAX_MISSED = 4096
+# uploads past this many pending ones are dropped rather than queued
+_MAX_PENDING_UPLOADS = 256
+# at exit, pending uploads are waited for at most this many seconds
+_EXIT_DRAIN_TIMEOUT = 5.0
+_NAME_RE = re.compile(r"^[\w.\-]+$")
+# launchers are built for the local Python and C library, so they are not shared
+_LOCAL_ONLY_SUFFIXES = (".so", )
+
+
+def default_remote_timeout() -> float:
+    return float(os.getenv("TRITON_REMOTE_CACHE_TIMEOUT", "2"))
+
+
+class _RemoteStore:
+
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+        # a single worker keeps uploads in order: the files of a group before the group.
+        # It is a daemon so that a slow store can't hold up the exit; `flush` waits for it
+        # for at most `_EXIT_DRAIN_TIMEOUT` seconds instead.
+        self.uploads = queue.Queue(maxsize=_MAX_PENDING_UPLOADS)
+        self.worker = None
+        self.lock = threading.Lock()
+        self.down_until = 0.0
+        # (key, filename) -> when the store last answered 404 for it
+        self.missed: Dict[Tuple[str, str], float] = dict()
+        self.stats = {"hits": 0, "misses": 0, "uploads": 0, "dropped": 0, "errors": 0}
+        atexit.register(self.flush, _EXIT_DRAIN_TIMEOUT)
+
+    def _available(self):
+        return time.monotonic() >= self.down_until
+
+    def _failed(self, e):
+        with self.lock:
+            self.stats["errors"] += 1
+            if self._available():
+                warnings.warn(f"Triton remote cache {self.url} is unavailable ({e}); "
+                              f"using the local cache only for the next {_RETRY_AFTER:g}s")
+            self.down_until = time.monotonic() + _RETRY_AFTER
+
+    def get(self, key, filename) -> Optional[bytes]:
+        if not self._available():
+            return None
+        with self.lock:
+            # a compile miss looks the entry up again under the lock
+            missed = self.missed.get((key, filename))
+        if missed is not None and time.monotonic() < missed + _MISS_TTL:
+            return None
+        try:
+            with urllib.request.urlopen(f"{self.url}/{key}/{filename}", timeout=default_remote_timeout()) as resp:
+                data = resp.read()
+        except urllib.error.HTTPError as e:
+            if e.code != 404:
+                self._failed(e)
+            with self.lock:
+                self.stats["misses"] += 1
+                if e.code == 404:
+                    if len(self.missed) >= _MAX_MISSED:
+                        self.missed.clear()
+                    self.missed[(key, filename)] = time.monotonic()
+            return None
+        except (OSError, ValueError) as e:
+            self._failed(e)
+            return None
+        with self.lock:
+            self.stats["hits"] += 1
+        return data
+
+    def _put(self, key, filename, data):
+        if not self._available():
+            return
+        request = urllib.request.Request(f"{self.url}/{key}/{filename}", data=data, method="PUT")
+        try:
+            with urllib.request.urlopen(request, timeout=default_remote_timeout()):
+                pass
+        except (OSError, ValueError) as e:
+            self._failed(e)
+            return
+        with self.lock:
+            self.stats["uploads"] += 1
+
+    def _work(self):
+        while True:
+            task = self.uploads.get()
+            try:
+                task()
+            except Exception as e:
+                self._failed(e)
+
+    def _submit(self, task, block=True, timeout=None):
+        with self.lock:
+            if self.worker is None:
+                self.worker = threading.Thread(target=self._work, name="triton-remote-cache", daemon=True)
+                self.worker.start()
+        self.uploads.put(task, block, timeout)
+
+    def put(self, key, filename, data):
+        with self.lock:
+            self.missed.pop((key, filename), None)
+        try:
+            self._submit(functools.partial(self._put, key, filename, data), block=False)
+        except queue.Full:
+            # the store can't keep up; the files stay in the local cache
+            with self.lock:
+                self.stats["dropped"] += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits (at most `timeout` seconds) for the uploads submitted so far.
+        Returns whether they are done.
+        """
+        if self.worker is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        done = threading.Event()
+        try:
+            self._submit(done.set, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+
+_stores: Dict[str, _RemoteStore] = dict()
+_stores_lock = threading.Lock()
+
+
+def _get_store(url) -> _RemoteStore:
+    with _stores_lock:
+        store = _stores.get(url)
+        if store is None:
+            store = _stores[url] = _RemoteStore(url)
+        return store
+
+
+class RemoteCacheManager(CacheManager):
+
+    def __init__(self, key, override=False, dump=False):
+        self.key = key
+        self.local = FileCacheManager(key, override=override, dump=dump)
+        url = os.getenv("TRITON_REMOTE_CACHE_URL", "").strip()
+        # overrides and dumps are local by nature
+        self.remote = _get_store(url) if url and not (override or dump) else None
+
+    def has_file(self, filename) -> bool:
+        return self.get_file(filename) is not None
+
+    def get_file(self, filename) -> Optional[str]:
+        path = self.local.get_file(filename)
+        if path is not None or self.remote is None or filename.endswith(_LOCAL_ONLY_SUFFIXES):
+            return path
+        data = self.remote.get(self.key, filename)
+        if data is None:
+            return None
+        return self.local.put(data, filename)
+
+    def get_group(self, filename: str) -> Optional[Dict[str, str]]:
+        group = self.local.get_group(filename)
+        if group is not None or self.remote is None:
+            return group
+        data = self.remote.get(self.key, f"__grp__{filename}")
+        if data is None:
+            return None
+        try:
+            children = json.loads(data)["children"]
+        except (ValueError, KeyError, TypeError):
+            return None
+        group = dict()
+        for child in children:
+            path = self.get_file(child)
+            # an incomplete group is a miss
+            if path is None:
+                return None
+            group[child] = path
+        self.local.put_group(filename, group)
+        return group
+
+    def put(self, data, filename, binary=True) -> str:
+        path = self.local.put(data, filename, binary=binary)
+        if self.remote is not None and not filename.endswith(_LOCAL_ONLY_SUFFIXES):
+            self.remote.put(self.key, filename, data if isinstance(data, bytes) else str(data).encode("utf-8"))
+        return path
+
+    def put_group(self, filename: str, group: Dict[str, str]):
+        path = self.local.put_group(filename, group)
+        if self.remote is not None:
+            # only files of this entry can be fetched by name
+            children = [c for c, p in group.items() if os.path.dirname(p) == self.local.cache_dir]
+            if len(children) == len(group):
+                self.remote.put(self.key, f"__grp__{filename}", json.dumps({"children": children}).encode("utf-8"))
+        return path
+
+    def lock(self, timeout: Optional[float] = None):
+        return self.local.lock(timeout)
+
+
+# -----------------------------------------------------------------------------
+# Reference store
+# -----------------------------------------------------------------------------
+
+
+class _StoreHandler(BaseHTTPRequestHandler):
+    directory = None
+
+    def _path(self):
+        parts = self.path.strip("/").split("/")
+        if len(parts) < 2 or not all(_NAME_RE.match(part) and part not in (".", "..") for part in parts[-2:]):
+            self.send_error(400, "expected /<key>/<filename>")
+            return None
+        return os.path.join(self.directory, parts[-2], parts[-1])
+
+    def do_GET(self):
+        path = self._path()
+        if path is None:
+            return
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_PUT(self):
+        path = self._path()
+        if path is None:
+            return
+        data = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp.{threading.get_ident()}"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(directory, host="127.0.0.1", port=0) -> ThreadingHTTPServer:
+    """
+    Creates (but doesn't start) a reference store that keeps its files in
+    `directory`. With `port=0` a free port is picked; see `server.server_address`.
+    """
+    handler = type("StoreHandler", (_StoreHandler, ), {"directory": os.path.abspath(directory)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m triton.runtime.remote_cache")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="run a reference remote cache store")
+    serve_parser.add_argument("directory")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+    server = make_server(args.directory, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"serving {args.directory} on http://{host}:{port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
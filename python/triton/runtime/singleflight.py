@@ -0,0 +1,54 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent computations of the same key.
+
+    The first thread to call `do(key, fn)` runs `fn`; threads that call `do`
+    with the same key while it is running block until it finishes and receive
+    its result (or its exception). Once `fn` returns, the key is forgotten, so
+    callers are expected to publish the result somewhere (e.g. a cache) before
+    returning from `fn`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = dict()
+        # number of calls that ran `fn` themselves
+        self.num_leaders = 0
+        # number of calls that waited on another thread's `fn`
+        self.num_waits = 0
+
+    def in_flight(self, key) -> bool:
+        with self._lock:
+            return key in self._inflight
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._inflight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._inflight[key] = future
+                self.num_leaders += 1
+            else:
+                self.num_waits += 1
+        if not is_leader:
+            return future.result()
+        try:
+            ret = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(ret)
+            return ret
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def stats(self):
+        with self._lock:
+            return {"leaders": self.num_leaders, "waits": self.num_waits, "in_flight": len(self._inflight)}
@@ -0,0 +1,87 @@
+from triton.backends.compiler import BaseBackend
+from triton._C.libtriton import ir, passes
+from dataclasses import dataclass
+from typing import Any
+import hashlib
+import re
+
+
+@dataclass(frozen=True)
+class NullOptions:
+    num_warps: int = 4
+    num_ctas: int = 1
+    num_stages: int = 3
+    cluster_dims: tuple = (1, 1, 1)
+    enable_warp_specialization: bool = False
+    enable_fp_fusion: bool = True
+    allow_fp8e4nv: bool = True
+    max_num_imprecise_acc_default: int = 0
+    extern_libs: dict = None
+    debug: bool = False
+
+    def __post_init__(self):
+        extern_libs = dict() if self.extern_libs is None else dict(self.extern_libs)
+        object.__setattr__(self, 'extern_libs', tuple(extern_libs.items()))
+        assert self.num_warps > 0 and (self.num_warps & (self.num_warps - 1)) == 0, \
+               "num_warps must be a power of 2"
+
+    def hash(self):
+        key = '_'.join([f'{name}-{val}' for name, val in self.__dict__.items()])
+        return hashlib.md5(key.encode("utf-8")).hexdigest()
+
+
+class NullBackend(BaseBackend):
+    """
+    Compiles kernels down to Triton IR only and emits a placeholder binary
+    that the null driver "loads" and "launches" without touching a device.
+    Used to measure the host-side cost of compiling and launching kernels.
+    """
+
+    @staticmethod
+    def supports_target(target: tuple):
+        return target[0] == 'null'
+
+    def __init__(self, target: tuple) -> None:
+        super().__init__(target)
+
+    def parse_options(self, opts) -> Any:
+        args = {k: opts[k] for k in NullOptions.__dataclass_fields__.keys() if k in opts}
+        return NullOptions(**args)
+
+    def load_dialects(self, ctx):
+        pass
+
+    @staticmethod
+    def make_ttir(mod, metadata, opt):
+        pm = ir.pass_manager(mod.context)
+        pm.enable_debug()
+        passes.common.add_inliner(pm)
+        passes.ttir.add_combine(pm)
+        passes.common.add_canonicalizer(pm)
+        passes.ttir.add_reorder_broadcast(pm)
+        passes.common.add_cse(pm)
+        passes.common.add_licm(pm)
+        passes.common.add_symbol_dce(pm)
+        pm.run(mod)
+        return mod
+
+    @staticmethod
+    def make_nullbin(src, metadata, opt):
+        src = str(src)
+        names = re.findall(r"tt\.func public @([a-zA-Z_][a-zA-Z0-9_]*)", src)
+        assert len(names) == 1
+        metadata["name"] = names[0]
+        metadata["shared"] = 0
+        metadata["cluster_dims"] = opt.cluster_dims
+        metadata["ids_of_tensormaps"] = None
+        return src.encode("utf-8")
+
+    def stage_options(self):
+        return {"ttir": ()}
+
+    def add_stages(self, stages, options):
+        stages["ttir"] = lambda src, metadata: self.make_ttir(src, metadata, options)
+        stages["nullbin"] = lambda src, metadata: self.make_nullbin(src, metadata, options)
+
+    def hash(self):
+        return 'null'
@@ -0,0 +1,121 @@
+import hashlib
+import os
+import tempfile
+from triton.runtime.build import _build
+from triton.runtime.cache import get_cache_manager
+from triton.backends import launcher
+from triton.backends.driver import DriverBase
+
+
+def compile_module_from_src(src, name):
+    key = hashlib.md5(src.encode("utf-8")).hexdigest()
+    cache = get_cache_manager(key)
+    cache_path = cache.get_file(f"{name}.so")
+    if cache_path is None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            src_path = os.path.join(tmpdir, "main.c")
+            with open(src_path, "w") as f:
+                f.write(src)
+            so = _build(name, src_path, tmpdir, [], [], [])
+            with open(so, "rb") as f:
+                cache_path = cache.put(f.read(), f"{name}.so", binary=True)
+    import importlib.util
+    spec = importlib.util.spec_from_file_location(name, cache_path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+# ------------------------
+# Utils
+# ------------------------
+
+
+class NullUtils(object):
+
+    def __new__(cls):
+        if not hasattr(cls, "instance"):
+            cls.instance = super(NullUtils, cls).__new__(cls)
+        return cls.instance
+
+    @staticmethod
+    def load_binary(name, kernel, shared, device):
+        # module, function, n_regs, n_spills
+        return 0, 0, 0, 0
+
+    @staticmethod
+    def unload_binary(module, device):
+        pass
+
+    @staticmethod
+    def get_device_properties(device):
+        return {"max_shared_mem": 2**31 - 1, "multiprocessor_count": 1, "sm_clock_rate": 0, "mem_clock_rate": 0,
+                "mem_bus_width": 0}
+
+
+# ------------------------
+# Launcher
+# ------------------------
+
+
+_LAUNCH_BODY = """
+  // keep the parameter array alive so the marshalling isn't optimized away
+  __asm__ volatile("" : : "r"(params) : "memory");"""
+
+
+def make_launcher(constants, signature, ids):
+    # Shares the argument handling of the CUDA launcher (tuple parsing, pointer
+    # extraction through `data_ptr`, launch hooks) but launches nothing.
+    return launcher.make_launcher_src(constants, signature, ids, _LAUNCH_BODY)
+
+
+class NullLauncher(object):
+
+    def __init__(self, src, metadata):
+        ids = {
+            "ids_of_folded_args": metadata.ids_of_folded_args,
+            "ids_of_const_exprs": src.fn.constexprs if hasattr(src, "fn") else tuple()
+        }
+        constants = src.constants if hasattr(src, "constants") else dict()
+        src = make_launcher(constants, src.signature, ids)
+        mod = compile_module_from_src(src, "__triton_launcher")
+        self.launch = mod.launch
+
+    def __call__(self, *args, **kwargs):
+        self.launch(*args, **kwargs)
+
+
+class NullDriver(DriverBase):
+    """
+    A driver for the `("null", 0)` target that accepts and marshals kernel
+    launches like a GPU driver but never talks to a device. It is never
+    picked automatically; select it with `TRITON_DRIVER=null`.
+    """
+
+    def __init__(self):
+        self.utils = NullUtils()
+        self.binary_ext = "nullbin"
+        self.launcher_cls = NullLauncher
+        super().__init__()
+
+    @staticmethod
+    def is_active():
+        return False
+
+    def get_current_target(self):
+        return ("null", 0)
+
+    def get_current_device(self):
+        return 0
+
+    def set_current_device(self, device):
+        pass
+
+    def get_current_stream(self, device=None):
+        return 0
+
+    def get_device_capability(self, device=None):
+        return (0, 0)
+
+    def assemble_tensormap_to_arg(self, tensormaps_info, args):
+        return args
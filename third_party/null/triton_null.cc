@@ -0,0 +1,8 @@
+#include <pybind11/pybind11.h>
+
+namespace py = pybind11;
+
+// The null backend only runs target-independent passes, so it has nothing to
+// register; the module exists so that it can be listed in
+// TRITON_CODEGEN_BACKENDS like the other backends.
+void init_triton_null(py::module &&m) {}
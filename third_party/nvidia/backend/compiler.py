@@ -554,6 +554,14 @@ class CUDABackend(BaseBackend):
                 os.remove(fbin)
         return cubin
 
+    def stage_options(self):
+        return {
+            "ttir": (),
+            "ttgir": ("num_warps", "num_ctas", "num_stages", "cluster_dims", "enable_warp_specialization",
+                      "optimize_epilogue"),
+            "llir": ("extern_libs", ),
+        }
+
     def add_stages(self, stages, options):
         stages["ttir"] = lambda src, metadata: self.make_ttir(src, metadata, options)
         stages["ttgir"] = lambda src, metadata: self.make_ttgir(src, metadata, options, self.capability)
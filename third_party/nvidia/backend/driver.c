@@ -295,6 +295,27 @@ static PyObject *loadBinary(PyObject *self, PyObject *args) {
                        n_spills);
 }
 
+static PyObject *unloadBinary(PyObject *self, PyObject *args) {
+  uint64_t mod;
+  int device;
+  if (!PyArg_ParseTuple(args, "Ki", &mod, &device)) {
+    return NULL;
+  }
+  CUcontext pctx = 0;
+
+  Py_BEGIN_ALLOW_THREADS;
+  CUDA_CHECK_AND_RETURN_NULL_ALLOW_THREADS(cuCtxGetCurrent(&pctx));
+  if (!pctx) {
+    CUDA_CHECK_AND_RETURN_NULL_ALLOW_THREADS(
+        cuDevicePrimaryCtxRetain(&pctx, device));
+    CUDA_CHECK_AND_RETURN_NULL_ALLOW_THREADS(cuCtxSetCurrent(pctx));
+  }
+  CUDA_CHECK_AND_RETURN_NULL_ALLOW_THREADS(cuModuleUnload((CUmodule)mod));
+  Py_END_ALLOW_THREADS;
+
+  Py_RETURN_NONE;
+}
+
 static PyObject *memAlloc(PyObject *self, PyObject *args) {
   size_t bytesize;
   CUdeviceptr dptr;
@@ -506,6 +527,8 @@ static PyObject *occupancyMaxActiveClusters(PyObject *self, PyObject *args) {
 static PyMethodDef ModuleMethods[] = {
     {"load_binary", loadBinary, METH_VARARGS,
      "Load provided cubin into CUDA driver"},
+    {"unload_binary", unloadBinary, METH_VARARGS,
+     "Unload a module previously returned by load_binary"},
     {"get_device_properties", getDeviceProperties, METH_VARARGS,
      "Get the properties for a given device"},
     {"cuMemAlloc", memAlloc, METH_VARARGS},